@@ -0,0 +1,96 @@
+"""Background prefetch of random cat and dog pictures, ready to print at the label width."""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from config_manager import ANIMAL_PREFETCH_BUFFER, ANIMAL_PREFETCH_RETRY
+from http_client import get_image, get_json
+from image_utils import PreparedImage
+
+logger = logging.getLogger("sticker_factory.animal_prefetch")
+
+
+class AnimalPrefetcher:
+    """
+    Keeps buffer_size random pictures from a thecatapi/thedogapi search endpoint ready per label width.
+
+    Each buffered item is (grayscale, dithered), prepared for the width it
+    was fetched for, so take() returns without any network or image work.
+    A width is only prefetched once prefetch() or take() asked for it, and
+    the thread starts on that first call. When the buffer is empty take()
+    fetches in the calling thread, so errors still reach the user. After a
+    failed background fetch the thread waits retry_after seconds.
+    """
+
+    def __init__(self, name, search_url, buffer_size=3, retry_after=30):
+        self.name = name
+        self.search_url = search_url
+        self.buffer_size = buffer_size
+        self.retry_after = retry_after
+        self._buffers = {}  # label width -> deque of (grayscale, dithered)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def fetch(self, label_width):
+        """Download one random picture and prepare it for label_width."""
+        image_url = get_json(self.search_url)[0]["url"]
+        logger.info(f"Fetched {self.name} image URL: {image_url}")
+        prepared = PreparedImage(get_image(image_url).convert('RGB'), label_width)
+        return prepared.grayscale, prepared.dithered()
+
+    def prefetch(self, label_width):
+        """Start filling the buffer for label_width in the background."""
+        with self._cond:
+            self._buffers.setdefault(label_width, deque())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"prefetch-{self.name}", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def take(self, label_width):
+        """Return (grayscale, dithered) for label_width, from the buffer if one is ready."""
+        self.prefetch(label_width)
+        with self._cond:
+            buffer = self._buffers[label_width]
+            item = buffer.popleft() if buffer else None
+            self._cond.notify()
+        if item is None:
+            logger.debug(f"No {self.name} prefetched for width {label_width}, fetching now")
+            item = self.fetch(label_width)
+        return item
+
+    def ready(self, label_width):
+        """Number of pictures buffered for label_width."""
+        with self._cond:
+            return len(self._buffers.get(label_width, ()))
+
+    def _next_width(self):
+        """A width whose buffer is not full, or None. Caller holds the condition."""
+        for width, buffer in self._buffers.items():
+            if len(buffer) < self.buffer_size:
+                return width
+        return None
+
+    def _run(self):
+        """Prefetch thread: top up buffers, sleeping while they are full"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._next_width() is not None)
+                width = self._next_width()
+            try:
+                item = self.fetch(width)
+            except Exception as e:
+                logger.warning(f"Prefetching {self.name} failed, retrying in {self.retry_after}s: {e}")
+                time.sleep(self.retry_after)
+                continue
+            with self._cond:
+                self._buffers[width].append(item)
+
+
+# Global prefetchers, shared by all sessions
+cat_prefetcher = AnimalPrefetcher("cat", "https://api.thecatapi.com/v1/images/search",
+                                  ANIMAL_PREFETCH_BUFFER, ANIMAL_PREFETCH_RETRY)
+dog_prefetcher = AnimalPrefetcher("dog", "https://api.thedogapi.com/v1/images/search",
+                                  ANIMAL_PREFETCH_BUFFER, ANIMAL_PREFETCH_RETRY)
@@ -0,0 +1,127 @@
+"""Cross-rerun caches for expensive per-tab work (PDF pages, URL fetches, upload decodes, fonts)."""
+
+import hashlib
+import io
+import logging
+import threading
+from collections import Counter
+
+import streamlit as st
+from PIL import Image
+
+from config_manager import (
+    PDF_CACHE_TTL,
+    PDF_CACHE_MAX_ENTRIES,
+    URL_CACHE_TTL,
+    URL_CACHE_MAX_ENTRIES,
+    UPLOAD_CACHE_TTL,
+    UPLOAD_CACHE_MAX_ENTRIES,
+)
+from http_client import get_image
+
+logger = logging.getLogger("sticker_factory.app_cache")
+
+
+class CacheStats:
+    """Per-stage call and miss counters; a call that did not miss was a hit."""
+
+    def __init__(self):
+        self._calls = Counter()
+        self._misses = Counter()
+        self.lock = threading.Lock()
+
+    def call(self, name):
+        with self.lock:
+            self._calls[name] += 1
+
+    def miss(self, name):
+        with self.lock:
+            self._misses[name] += 1
+
+    def snapshot(self):
+        """Return {stage: {calls, hits, misses, hit_rate}}."""
+        with self.lock:
+            stats = {}
+            for name, calls in self._calls.items():
+                misses = min(self._misses[name], calls)
+                stats[name] = {
+                    "calls": calls,
+                    "hits": calls - misses,
+                    "misses": misses,
+                    "hit_rate": (calls - misses) / calls if calls else 0.0,
+                }
+            return stats
+
+
+# Global stats, shared by all sessions like the caches themselves
+cache_stats = CacheStats()
+
+
+def content_hash(data):
+    """Return a short hex digest of raw bytes, used as the cache key for uploads."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Cached bodies run only on a miss. Arguments starting with an underscore are
+# not hashed by Streamlit; the digest next to them is the key instead.
+
+@st.cache_data(ttl=PDF_CACHE_TTL, max_entries=PDF_CACHE_MAX_ENTRIES, show_spinner=False)
+def _render_pdf_page(_data, digest, page, dpi):
+    cache_stats.miss("pdf")
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=_data, filetype="pdf") as document:
+        pix = document.load_page(page).get_pixmap(dpi=dpi)
+        return Image.open(io.BytesIO(pix.tobytes("png")))
+
+
+@st.cache_data(ttl=PDF_CACHE_TTL, max_entries=PDF_CACHE_MAX_ENTRIES, show_spinner=False)
+def _count_pdf_pages(_data, digest):
+    cache_stats.miss("pdf_pages")
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=_data, filetype="pdf") as document:
+        return document.page_count
+
+
+@st.cache_data(ttl=URL_CACHE_TTL, max_entries=URL_CACHE_MAX_ENTRIES, show_spinner=False)
+def _fetch_image(url):
+    cache_stats.miss("url")
+    return get_image(url)
+
+
+@st.cache_data(ttl=UPLOAD_CACHE_TTL, max_entries=UPLOAD_CACHE_MAX_ENTRIES, show_spinner=False)
+def _decode_image(_data, digest, mode):
+    cache_stats.miss("upload")
+    image = Image.open(io.BytesIO(_data))
+    image.load()
+    return image.convert(mode) if mode else image
+
+
+def load_pdf_page(data, page=0, dpi=92):
+    """Render one page of a PDF (bytes) to an image, cached by document hash, page and DPI."""
+    cache_stats.call("pdf")
+    return _render_pdf_page(data, content_hash(data), page, dpi)
+
+
+def pdf_page_count(data):
+    """Number of pages of a PDF (bytes), cached by document hash."""
+    cache_stats.call("pdf_pages")
+    return _count_pdf_pages(data, content_hash(data))
+
+
+def fetch_image(url):
+    """
+    Download an image, cached by URL.
+
+    Raises requests exceptions on network errors and ValueError if the URL
+    does not serve an image or is too large; failures are not cached.
+    """
+    cache_stats.call("url")
+    return _fetch_image(url)
+
+
+def decode_upload(data, mode=None):
+    """Decode uploaded image bytes (optionally converted to mode), cached by content hash."""
+    cache_stats.call("upload")
+    return _decode_image(data, content_hash(data), mode)
@@ -0,0 +1 @@
+"""Micro benchmarks for the Sticker Factory; run e.g. `python -m benchmarks.bench_dithering`."""
@@ -0,0 +1,62 @@
+"""
+Compare the dithering algorithms against Pillow on label-sized images.
+
+Usage: python -m benchmarks.bench_dithering [--repeat N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from dithering import ALGORITHMS, FLOYD_STEINBERG, dither, error_diffusion
+
+# (label, width in dots, height in dots): 62mm and 102mm continuous tape
+SIZES = [
+    ("62mm", 696, 928),
+    ("102mm", 1164, 1552),
+]
+
+
+def make_photo(width, height, seed=0):
+    """Grayscale test image with smooth gradients and fine noise, like a scaled photo."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = 127 + 80 * np.sin(x / 37.0) * np.cos(y / 53.0) + 40 * (x / width - 0.5) + rng.normal(0, 12, (height, width))
+    return Image.fromarray(pixels.clip(0, 255).astype(np.uint8), mode="L")
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the best one is reported")
+    args = parser.parse_args()
+
+    for label, width, height in SIZES:
+        image = make_photo(width, height)
+        cases = {
+            "pillow floyd-steinberg": lambda: image.convert("1", dither=Image.FLOYDSTEINBERG),
+            "pillow threshold": lambda: image.point(lambda v: 255 if v >= 128 else 0, mode="1"),
+            "numpy floyd-steinberg": lambda: error_diffusion(image, FLOYD_STEINBERG),
+        }
+        for algorithm in ALGORITHMS:
+            cases[f"dither({algorithm})"] = lambda algorithm=algorithm: dither(image, algorithm)
+
+        print(f"\n{label} label, {width}x{height} dots ({width * height / 1e6:.2f} Mpx), best of {args.repeat}")
+        results = {name: best_of(func, args.repeat) for name, func in cases.items()}
+        baseline = results["pillow floyd-steinberg"]
+        for name, seconds in results.items():
+            print(f"  {name:<26} {seconds * 1000:9.1f} ms  {seconds / baseline:7.2f}x pillow FS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Time fitting label text to the tape width: the old linear scan against fit_font_size.
+
+Usage: python -m benchmarks.bench_font_fit [--repeat N]
+"""
+
+import argparse
+import os
+import time
+
+from PIL import ImageFont
+
+import font_cache
+from font_cache import fit_font_size, get_font
+
+FONTS = [
+    "fonts/5x5-Tami.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+    "/System/Library/Fonts/Helvetica.ttf",
+]
+
+# (label width in dots, text)
+CASES = [
+    ("62mm, 1 short line", 696, "write something"),
+    ("62mm, 12 lines", 696, "\n".join(f"line {i}: inventory bin {i * 37:04d} / shelf B" for i in range(12))),
+    ("102mm, 40 lines", 1164, "\n".join(f"{i:02d} the quick brown fox jumps over the lazy dog" for i in range(40))),
+]
+
+
+def linear_fit(width, text, font_path, start_size=10, end_size=200):
+    """The Label tab's original search: load and measure every size in turn."""
+    lines = [line for line in text.split("\n") if line.strip()]
+    best = start_size
+    for size in range(start_size, end_size):
+        font = ImageFont.truetype(font_path, size)
+        if max(font.getbbox(line)[2] for line in lines) <= width:
+            best = size
+        else:
+            break
+    return best
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def cold_fit(width, text, font_path):
+    font_cache.get_font.cache_clear()
+    return fit_font_size(width, text, font_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the best one is reported")
+    args = parser.parse_args()
+
+    for font_path in (path for path in FONTS if os.path.exists(path)):
+        print(f"\n{font_path}, best of {args.repeat}")
+        for name, width, text in CASES:
+            linear, expected = best_of(lambda: linear_fit(width, text, font_path), args.repeat)
+            cold, size = best_of(lambda: cold_fit(width, text, font_path), args.repeat)
+            loads = get_font.cache_info().currsize
+            warm, _ = best_of(lambda: fit_font_size(width, text, font_path), args.repeat)
+            check = "" if size == expected else f"  (linear found {expected})"
+            print(f"  {name:<20} size {size:3d}{check}")
+            print(f"    linear scan        {linear * 1000:8.2f} ms  {expected - 8:4d} font loads")
+            print(f"    fit, cold cache    {cold * 1000:8.2f} ms  {loads:4d} font loads  {linear / cold:6.1f}x")
+            print(f"    fit, warm cache    {warm * 1000:8.2f} ms  {0:4d} font loads  {linear / warm:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
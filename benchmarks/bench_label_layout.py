@@ -0,0 +1,73 @@
+"""
+Time rendering text labels: the Label tab's old measure-twice loop against label_layout.
+
+Usage: python -m benchmarks.bench_label_layout [--repeat N]
+"""
+
+import argparse
+import time
+
+from PIL import Image, ImageDraw
+
+import label_layout
+from font_cache import get_font
+from label_layout import render_text_label
+
+FONT = "fonts/5x5-Tami.ttf"
+
+# (label, width in dots, font size, text)
+CASES = [
+    ("62mm, 1 line", 696, 60, "write something"),
+    ("62mm, 12 lines", 696, 29, "\n".join(f"line {i}: inventory bin {i * 37:04d} / shelf B" for i in range(12))),
+    ("102mm, 40 lines", 1164, 39, "\n".join(f"{i:02d} the quick brown fox jumps over the lazy dog" for i in range(40))),
+]
+
+
+def two_pass(text, width, size, line_spacing=20, padding=20):
+    """The old Label tab: measure every line for the height, then again while drawing."""
+    font = get_font(FONT, size)
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1), color="white"))
+    height = 0
+    for line in text.split("\n"):
+        ascent, descent = font.getmetrics()
+        bbox = draw.textbbox((0, 0), line, font=font)
+        height += max(bbox[3] - bbox[1], ascent + descent) + line_spacing
+    img = Image.new("RGB", (width, height + 2 * padding), color="white")
+    draw = ImageDraw.Draw(img)
+    y = padding
+    for line in text.split("\n"):
+        ascent, descent = font.getmetrics()
+        bbox = draw.textbbox((0, y), line, font=font)
+        draw.text(((width - (bbox[2] - bbox[0])) // 2, y), line, font=font, fill=(0, 0, 0))
+        y += max(bbox[3] - bbox[1], ascent + descent) + line_spacing
+    return img
+
+
+def best_of(func, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the best one is reported")
+    args = parser.parse_args()
+
+    print(f"{FONT}, best of {args.repeat}")
+    for name, width, size, text in CASES:
+        old = best_of(lambda: two_pass(text, width, size), args.repeat)
+        cold = best_of(lambda: render_text_label(text, width, FONT, size), args.repeat,
+                       setup=label_layout.measure_run.cache_clear)
+        warm = best_of(lambda: render_text_label(text, width, FONT, size), args.repeat)
+        print(f"  {name:<16} two-pass {old * 1000:7.2f} ms  layout cold {cold * 1000:7.2f} ms"
+              f"  warm {warm * 1000:7.2f} ms  ({old / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Thread-safe LRU cache of byte strings, bounded by entry count and total size."""
+
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("sticker_factory.bytes_lru")
+
+
+class BytesLRU:
+    """LRU cache of bytes values with size- and count-based eviction."""
+
+    def __init__(self, max_entries=64, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached bytes for key, or None on a miss."""
+        with self.lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting least recently used entries as needed."""
+        value = bytes(value)
+        if len(value) > self.max_bytes:
+            logger.debug(f"Not caching {len(value)} bytes, larger than cache limit")
+            return
+        with self.lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Return hit/miss counters and current usage."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
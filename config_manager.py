@@ -31,12 +31,65 @@ APP_CONFIG = CONFIG.get("app", {})
 UI_CONFIG = CONFIG.get("ui", {})
 TABS_CONFIG = CONFIG.get("tabs", {})
 LOGGING_CONFIG = CONFIG.get("logging", {})
+CACHE_CONFIG = CONFIG.get("cache", {})
+PRINTER_CONFIG = CONFIG.get("printer", {})
+QUEUE_CONFIG = CONFIG.get("queue", {})
+ARCHIVE_CONFIG = CONFIG.get("archive", {})
+HTTP_CONFIG = CONFIG.get("http", {})
 
 PRIVACY_MODE = APP_CONFIG.get("privacy_mode", True)
 APP_TITLE = APP_CONFIG.get("title", "STICKER FACTORY")
 HISTORY_LIMIT = UI_CONFIG.get("history_limit", 15)
+QUEUE_VIEW = UI_CONFIG.get("queue_view", True)
+PREVIEW_WIDTH = UI_CONFIG.get("preview_width", 720)
+
+DEBUG_TEMP_FILES = PRINTER_CONFIG.get("debug_temp_files", False)
+PRINTER_IDLE_TIMEOUT = PRINTER_CONFIG.get("idle_timeout", 60)
+PRINTER_DISCOVERY_INTERVAL = PRINTER_CONFIG.get("discovery_interval", 30)
+PRINTER_PROBE_TIMEOUT = PRINTER_CONFIG.get("probe_timeout", 3)
+PRINTER_PROBE_WORKERS = PRINTER_CONFIG.get("probe_workers", 4)
 
 ENABLE_FILE_LOGGING = LOGGING_CONFIG.get("file", False)
 FILE_LOG_LEVEL = LOGGING_CONFIG.get("file_level", "WARNING")
 ENABLE_STDOUT = LOGGING_CONFIG.get("stdout", True)
 STDOUT_LOG_LEVEL = LOGGING_CONFIG.get("stdout_level", "INFO")
+
+QUEUE_PIPELINE = QUEUE_CONFIG.get("pipeline", True)
+QUEUE_PIPELINE_DEPTH = QUEUE_CONFIG.get("pipeline_depth", 2)
+QUEUE_RASTER_WORKERS = QUEUE_CONFIG.get("raster_workers", 2)
+QUEUE_SESSION_INFLIGHT_LIMIT = QUEUE_CONFIG.get("session_inflight_limit", 5)
+QUEUE_JOURNAL = QUEUE_CONFIG.get("journal", False)
+QUEUE_JOURNAL_PATH = QUEUE_CONFIG.get("journal_path", "logs/print_journal.jsonl")
+QUEUE_JOURNAL_COMPACT_LINES = QUEUE_CONFIG.get("journal_compact_lines", 1000)
+
+RASTER_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("raster_max_entries", 64)
+RASTER_CACHE_MAX_MB = CACHE_CONFIG.get("raster_max_mb", 64)
+PREPARED_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("prepared_max_entries", 32)
+PREVIEW_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("preview_max_entries", 128)
+PREVIEW_CACHE_MAX_MB = CACHE_CONFIG.get("preview_max_mb", 16)
+PDF_CACHE_TTL = CACHE_CONFIG.get("pdf_ttl", 600)
+PDF_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("pdf_max_entries", 16)
+PDF_PAGE_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("pdf_page_max_entries", 64)
+PDF_PAGE_CACHE_MAX_MB = CACHE_CONFIG.get("pdf_page_max_mb", 32)
+URL_CACHE_TTL = CACHE_CONFIG.get("url_ttl", 600)
+URL_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("url_max_entries", 32)
+UPLOAD_CACHE_TTL = CACHE_CONFIG.get("upload_ttl", 600)
+UPLOAD_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("upload_max_entries", 16)
+FONT_CATALOG_PATH = CACHE_CONFIG.get("font_catalog_path", ".cache/font_catalog.json")
+FONT_CATALOG_INTERVAL = CACHE_CONFIG.get("font_catalog_interval", 60)
+FONT_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("font_max_entries", 256)
+LAYOUT_CACHE_MAX_ENTRIES = CACHE_CONFIG.get("layout_max_entries", 4096)
+HISTORY_INDEX_PATH = CACHE_CONFIG.get("history_index_path", "labels/history.sqlite")
+HISTORY_THUMBNAIL_PX = CACHE_CONFIG.get("history_thumbnail_px", 240)
+
+ARCHIVE_DIR = ARCHIVE_CONFIG.get("dir", "labels")
+ARCHIVE_LOG_PATH = ARCHIVE_CONFIG.get("log_path", "labels/archive_log.jsonl")
+ARCHIVE_QUOTA_MB = ARCHIVE_CONFIG.get("quota_mb", 512)
+ARCHIVE_COMPRESS_LEVEL = ARCHIVE_CONFIG.get("compress_level", 6)
+
+HTTP_TIMEOUT = HTTP_CONFIG.get("timeout", 10)
+HTTP_MAX_MB = HTTP_CONFIG.get("max_mb", 20)
+HTTP_POOL_SIZE = HTTP_CONFIG.get("pool_size", 8)
+HTTP_RETRIES = HTTP_CONFIG.get("retries", 2)
+ANIMAL_PREFETCH_BUFFER = HTTP_CONFIG.get("animal_prefetch", 3)
+ANIMAL_PREFETCH_RETRY = HTTP_CONFIG.get("animal_prefetch_retry", 30)
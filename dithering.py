@@ -0,0 +1,116 @@
+"""1-bit dithering algorithms for thermal label output."""
+
+import logging
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger("sticker_factory.dithering")
+
+# Algorithm id -> name shown in the UI
+ALGORITHMS = {
+    "floyd-steinberg": "Floyd–Steinberg",
+    "atkinson": "Atkinson",
+    "bayer4": "Ordered (Bayer 4x4)",
+    "bayer8": "Ordered (Bayer 8x8)",
+    "threshold": "Threshold",
+}
+DEFAULT_ALGORITHM = "floyd-steinberg"
+
+# Error diffusion kernels as (dx, dy, weight)
+FLOYD_STEINBERG = ((1, 0, 7 / 16), (-1, 1, 3 / 16), (0, 1, 5 / 16), (1, 1, 1 / 16))
+# Atkinson spreads only 3/4 of the error, which keeps highlights and shadows clean
+ATKINSON = ((1, 0, 1 / 8), (2, 0, 1 / 8), (-1, 1, 1 / 8), (0, 1, 1 / 8), (1, 1, 1 / 8), (0, 2, 1 / 8))
+
+
+def _to_grayscale(image):
+    """Flatten transparency onto white and convert to 8-bit grayscale."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, "white")
+        image = Image.alpha_composite(background, image)
+    return image if image.mode == "L" else image.convert("L")
+
+
+def _to_bilevel(mask):
+    """Build a mode '1' image from a boolean array where True is white."""
+    return Image.fromarray(mask)
+
+
+def bayer_matrix(n):
+    """Return the n x n Bayer index matrix (n a power of two)."""
+    matrix = np.zeros((1, 1), dtype=np.int32)
+    while matrix.shape[0] < n:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return matrix
+
+
+def threshold(image, level=128):
+    """White where the pixel is at least level, black elsewhere."""
+    pixels = np.asarray(_to_grayscale(image))
+    return _to_bilevel(pixels >= level)
+
+
+def ordered(image, n=4):
+    """Ordered dithering against a tiled n x n Bayer threshold map."""
+    pixels = np.asarray(_to_grayscale(image))
+    height, width = pixels.shape
+    thresholds = (bayer_matrix(n) + 0.5) * (255 / (n * n))
+    tiled = np.tile(thresholds, (-(-height // n), -(-width // n)))[:height, :width]
+    return _to_bilevel(pixels > tiled)
+
+
+def error_diffusion(image, kernel=FLOYD_STEINBERG, level=128):
+    """
+    Error diffusion dithering with the given kernel, vectorized with NumPy.
+
+    Pixels are visited in wavefronts x + 2y = t instead of one at a time:
+    every kernel offset pushes error to a strictly later front, so all
+    pixels on a front are final once the earlier fronts are done and can be
+    quantized together. The result matches the usual row-by-row scan.
+    """
+    pixels = np.asarray(_to_grayscale(image), dtype=np.float32)
+    height, width = pixels.shape
+    if not height or not width:
+        return _to_bilevel(np.ones((height, width), dtype=bool))
+
+    # Pad so that error pushed past the edges lands in a margin and is dropped
+    left = max(0, -min(dx for dx, _, _ in kernel))
+    right = max(0, max(dx for dx, _, _ in kernel))
+    bottom = max(dy for _, dy, _ in kernel)
+    stride = width + left + right
+    buffer = np.zeros((height + bottom, stride), dtype=np.float32)
+    buffer[:height, left:left + width] = pixels
+    flat = buffer.reshape(-1)
+    out = np.zeros(height * width, dtype=bool)
+    offsets = [(dy * stride + dx, weight) for dx, dy, weight in kernel]
+
+    rows = np.arange(height)
+    for front in range(width + 2 * (height - 1)):
+        ys = rows[max(0, (front - width + 2) // 2):min(height - 1, front // 2) + 1]
+        xs = front - 2 * ys
+        index = ys * stride + xs + left
+        values = flat[index]
+        white = values >= level
+        out[ys * width + xs] = white
+        error = values - white * np.float32(255)
+        for offset, weight in offsets:
+            flat[index + offset] += error * weight
+    return _to_bilevel(out.reshape(height, width))
+
+
+def dither(image, algorithm=DEFAULT_ALGORITHM, level=128):
+    """Convert image to 1-bit (mode '1') with the named algorithm."""
+    if algorithm == "floyd-steinberg":
+        # Pillow's C implementation is much faster than error_diffusion; it
+        # rounds the error to integers, so the patterns differ slightly
+        return _to_grayscale(image).convert("1", dither=Image.FLOYDSTEINBERG)
+    if algorithm == "atkinson":
+        return error_diffusion(image, ATKINSON, level)
+    if algorithm == "bayer4":
+        return ordered(image, 4)
+    if algorithm == "bayer8":
+        return ordered(image, 8)
+    if algorithm == "threshold":
+        return threshold(image, level)
+    raise ValueError(f"Unknown dithering algorithm: {algorithm}")
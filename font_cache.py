@@ -0,0 +1,76 @@
+"""Process-wide cache of loaded fonts and fitting of text to a label width."""
+
+import logging
+from functools import lru_cache
+
+from PIL import ImageFont
+
+from config_manager import FONT_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger("sticker_factory.font_cache")
+
+# Size the width estimate is measured at; large enough that hinting barely matters
+PROBE_SIZE = 100
+
+
+@lru_cache(maxsize=FONT_CACHE_MAX_ENTRIES)
+def get_font(font_path, size):
+    """
+    Return ImageFont.truetype(font_path, size), loaded once per process; raises OSError like truetype.
+
+    A font_path of None gives Pillow's built-in default font.
+    """
+    if font_path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(font_path, size)
+
+
+def text_width(font, lines):
+    """Right edge in pixels of the widest line drawn at x=0."""
+    return max(font.getbbox(line)[2] for line in lines)
+
+
+def fit_font_size(width, text, font_path, min_size=10, max_size=200):
+    """
+    Return the largest size in [min_size, max_size) at which every line of text fits in width.
+
+    Text width grows roughly linearly with size, so one measurement at
+    PROBE_SIZE gives an estimate that is usually right or off by one; the
+    estimate is checked against its neighbour and a binary search over the
+    remaining range handles the rest. That is 3 to 10 measurements instead
+    of one per size. Returns min_size if even that is too wide. Raises
+    ValueError if text has no non-blank line and OSError if the font cannot
+    be loaded.
+    """
+    lines = [line for line in text.split("\n") if line.strip()]
+    if not lines:
+        raise ValueError("no text to fit")
+
+    def fits(size):
+        return text_width(get_font(font_path, size), lines) <= width
+
+    lo, hi = min_size, max_size - 1  # answer lies in [lo, hi]
+    probe_width = text_width(get_font(font_path, PROBE_SIZE), lines)
+    if probe_width > 0:
+        guess = min(max(int(PROBE_SIZE * width / probe_width), lo), hi)
+        if fits(guess):
+            lo = guess
+            if guess == hi or not fits(guess + 1):
+                return guess
+            lo = guess + 1
+        else:
+            hi = guess - 1
+            if hi < lo:
+                return min_size
+            if fits(hi):
+                return hi
+            hi -= 1
+
+    # Invariant: everything below lo fits (or lo is min_size)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
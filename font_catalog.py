@@ -0,0 +1,206 @@
+"""Process-wide catalog of installed fonts, persisted to disk between restarts."""
+
+import json
+import logging
+import os
+import platform
+import threading
+import time
+
+from PIL import ImageFont
+
+from config_manager import FONT_CATALOG_PATH, FONT_CATALOG_INTERVAL
+
+logger = logging.getLogger("sticker_factory.font_catalog")
+
+DEFAULT_FONT = "fonts/5x5-Tami.ttf"
+INDEX_VERSION = 1
+
+
+def system_font_dirs():
+    """Return the system font directories for this platform."""
+    system = platform.system()
+    user = os.environ.get('USER', '')
+    if system == "Windows":
+        return ["C:/Windows/Fonts/", "C:/Windows/System32/Fonts/"]
+    if system == "Darwin":
+        return ["/System/Library/Fonts/", "/Library/Fonts/", f"/Users/{user}/Library/Fonts/"]
+    if system == "Linux":
+        return ["/usr/share/fonts/", "/usr/local/share/fonts/", f"/home/{user}/.fonts/", f"/home/{user}/.local/share/fonts/"]
+    return []
+
+
+def read_font_names(path):
+    """Return (family, style) from the font's name table, or (file name, "") if it cannot be read."""
+    try:
+        family, style = ImageFont.truetype(path, 12).getname()
+        return family or os.path.splitext(os.path.basename(path))[0], style or ""
+    except Exception:
+        return os.path.splitext(os.path.basename(path))[0], ""
+
+
+def display_name(family, style):
+    """Name shown in the font picker (e.g. 'Guatemala Italic')."""
+    return f"{family} {style}" if style else family
+
+
+class FontCatalog:
+    """
+    Font paths with their family/style names, shared by all sessions.
+
+    The index (font path -> mtime, family, style, plus the mtime of every
+    scanned directory) is kept in a small JSON file, so a restart serves the
+    previous list at once. A background thread re-stats the directories
+    every check_interval seconds; a file added or removed changes its
+    directory's mtime, and only then are the directories walked again.
+    Fonts whose mtime did not change keep their names, so only new or
+    updated files are opened.
+    """
+
+    def __init__(self, index_path, check_interval=60, local_dir="fonts/", system_dirs=None):
+        self.index_path = index_path
+        self.check_interval = check_interval
+        self.local_dir = local_dir
+        self.system_dirs = system_font_dirs() if system_dirs is None else system_dirs
+        self._fonts = {}  # path -> {"mtime", "family", "style"}, in display order
+        self._dirs = {}  # directory -> mtime when last walked
+        self._ready = threading.Event()
+        self.lock = threading.Lock()
+        if self._load():
+            self._ready.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def fonts(self, timeout=10):
+        """Return font paths, default font first, waiting up to timeout for the first scan."""
+        self._ready.wait(timeout)
+        with self.lock:
+            return list(self._fonts) or [DEFAULT_FONT]
+
+    def display_name(self, path):
+        """Return the family/style name of a font, reading the file only if it is not in the catalog."""
+        with self.lock:
+            entry = self._fonts.get(path)
+        if entry is None:
+            return display_name(*read_font_names(path))
+        return display_name(entry["family"], entry["style"])
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != INDEX_VERSION:
+                return False
+            with self.lock:
+                self._fonts = index["fonts"]
+                self._dirs = index["dirs"]
+            logger.info(f"Loaded {len(self._fonts)} fonts from {self.index_path}")
+            return True
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable font catalog {self.index_path}: {e}")
+            return False
+
+    def _save(self):
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            index = {"version": INDEX_VERSION, "fonts": self._fonts, "dirs": self._dirs}
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _stale(self):
+        """True if any scanned directory changed, vanished or appeared since the last walk."""
+        with self.lock:
+            dirs = dict(self._dirs)
+        if not dirs:
+            return True
+        for directory, mtime in dirs.items():
+            try:
+                if os.stat(directory).st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        roots = [self.local_dir] + self.system_dirs
+        return any(root not in dirs and os.path.isdir(root) for root in roots)
+
+    def _walk(self):
+        """Return (font paths in display order, directory mtimes) from the file system."""
+        paths = []
+        dirs = {}
+
+        def stat_dir(directory):
+            try:
+                dirs[directory] = os.stat(directory).st_mtime
+            except OSError:
+                pass
+
+        if os.path.exists(DEFAULT_FONT):
+            paths.append(DEFAULT_FONT)
+        if os.path.isdir(self.local_dir):
+            stat_dir(self.local_dir)
+            try:
+                for font_file in sorted(os.listdir(self.local_dir)):
+                    if font_file.endswith((".ttf", ".otf")) and font_file != os.path.basename(DEFAULT_FONT):
+                        paths.append(self.local_dir + font_file)
+            except OSError:
+                pass
+        for font_dir in self.system_dirs:
+            if not os.path.exists(font_dir):
+                continue
+            try:
+                for root, subdirs, files in os.walk(font_dir):
+                    subdirs.sort()
+                    stat_dir(root)
+                    for file in sorted(files):
+                        if file.lower().endswith('.ttf'):
+                            paths.append(os.path.join(root, file))
+            except (OSError, PermissionError):
+                continue
+        return list(dict.fromkeys(paths)), dirs
+
+    def _scan(self):
+        started = time.time()
+        paths, dirs = self._walk()
+        with self.lock:
+            previous = self._fonts
+        fonts = {}
+        opened = 0
+        for path in paths:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            entry = previous.get(path)
+            if entry is None or entry["mtime"] != mtime:
+                family, style = read_font_names(path)
+                entry = {"mtime": mtime, "family": family, "style": style}
+                opened += 1
+            fonts[path] = entry
+        with self.lock:
+            self._fonts = fonts
+            self._dirs = dirs
+        logger.info(f"Font catalog: {len(fonts)} fonts, {opened} read, in {time.time() - started:.2f}s")
+        try:
+            self._save()
+        except OSError as e:
+            logger.warning(f"Could not write font catalog {self.index_path}: {e}")
+
+    def _run(self):
+        """Catalog thread: rescan whenever a font directory changed"""
+        while True:
+            try:
+                if self._stale():
+                    self._scan()
+            except Exception as e:
+                logger.error(f"Error scanning fonts: {e}")
+            self._ready.set()
+            time.sleep(self.check_interval)
+
+
+# Global font catalog instance
+font_catalog = FontCatalog(FONT_CATALOG_PATH, FONT_CATALOG_INTERVAL)
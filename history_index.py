@@ -0,0 +1,189 @@
+"""SQLite index of saved labels and stickers with thumbnails for the History gallery."""
+
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+from PIL import Image
+
+from config_manager import HISTORY_INDEX_PATH, HISTORY_THUMBNAIL_PX
+
+logger = logging.getLogger("sticker_factory.history_index")
+
+HISTORY_DIRS = ("temp", "labels")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+HistoryEntry = namedtuple("HistoryEntry", ["path", "digest", "mtime", "width", "height", "thumbnail", "name"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    thumbnail BLOB NOT NULL,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS images_mtime ON images (mtime);
+CREATE INDEX IF NOT EXISTS images_digest ON images (digest);
+"""
+
+# A rescan keeps the name recorded when the file was saved
+_UPSERT = """
+INSERT INTO images (path, digest, mtime, size, width, height, thumbnail, name) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET digest = excluded.digest, mtime = excluded.mtime, size = excluded.size,
+    width = excluded.width, height = excluded.height, thumbnail = excluded.thumbnail,
+    name = COALESCE(excluded.name, images.name)
+"""
+
+
+def is_history_image(name):
+    """True for image files the gallery shows (the default 'write something' label is skipped)."""
+    name = name.lower()
+    return name.endswith(IMAGE_EXTENSIONS) and "write_something" not in name
+
+
+def make_thumbnail(image, max_px):
+    """Encode a thumbnail of at most max_px on each side as PNG bytes."""
+    thumb = image.copy() if image.mode in ("L", "RGB", "RGBA") else image.convert("RGBA")
+    thumb.thumbnail((max_px, max_px), Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumb.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class HistoryIndex:
+    """
+    Saved images with content hash, mtime, dimensions and a thumbnail.
+
+    Files are indexed once: add() is called when an image is saved, and
+    sync() reconciles the index with the directories (one stat per file;
+    only new or modified files are read). name is the original filename of
+    files saved under another name (the label archive names files by
+    content hash); search matches it as well. The gallery pages through the
+    index with count() and page(), so it neither rescans the directories
+    nor opens full-size images to show them. Duplicates are detected by
+    content hash; with unique, only the newest file of each hash is listed.
+    """
+
+    def __init__(self, db_path, directories=HISTORY_DIRS, thumbnail_px=240):
+        self.db_path = db_path
+        self.directories = directories
+        self.thumbnail_px = thumbnail_px
+        self.lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        # Opened lazily and shared by the session and print worker threads
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(images)")]
+            if "name" not in columns:
+                # Index created before names were recorded
+                self._conn.execute("ALTER TABLE images ADD COLUMN name TEXT")
+        return self._conn
+
+    def _entry(self, path, image=None, name=None):
+        """Build the row for a file, reading it once; returns None if it is not a readable image."""
+        try:
+            stat = os.stat(path)
+            with open(path, "rb") as f:
+                data = f.read()
+            if image is None:
+                image = Image.open(io.BytesIO(data))
+            return (path, hashlib.blake2b(data, digest_size=16).hexdigest(), stat.st_mtime, stat.st_size,
+                    image.width, image.height, make_thumbnail(image, self.thumbnail_px), name)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Not indexing {path}: {e}")
+            return None
+
+    def add(self, path, image=None, name=None):
+        """
+        Index a newly saved file; pass the image that was saved to skip decoding it again.
+
+        name is the filename the image came with, if the file was saved
+        under another one; without it an existing name is kept.
+        """
+        row = self._entry(path, image, name)
+        if row is None:
+            return
+        with self.lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(_UPSERT, row)
+
+    def remove(self, path):
+        """Drop a deleted file from the index."""
+        with self.lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM images WHERE path = ?", (path,))
+
+    def sync(self):
+        """Bring the index up to date with the directories; returns (added or updated, removed)."""
+        on_disk = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file() and is_history_image(entry.name):
+                            stat = entry.stat()
+                            on_disk[os.path.join(directory, entry.name)] = (stat.st_mtime, stat.st_size)
+            except FileNotFoundError:
+                continue
+        with self.lock:
+            indexed = {path: (mtime, size) for path, mtime, size in
+                       self._connection().execute("SELECT path, mtime, size FROM images")}
+        removed = [path for path in indexed if path not in on_disk]
+        changed = [path for path, stat in on_disk.items() if indexed.get(path) != stat]
+        rows = [row for row in map(self._entry, changed) if row is not None]
+        with self.lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("DELETE FROM images WHERE path = ?", ((path,) for path in removed))
+                conn.executemany(_UPSERT, rows)
+        if rows or removed:
+            logger.info(f"History index: {len(rows)} added or updated, {len(removed)} removed")
+        return len(rows), len(removed)
+
+    def _query(self, columns, unique, search, limit):
+        # The newest `limit` files (one per content hash with unique), then the filename or name search
+        newest = "SELECT path, MAX(mtime) AS mtime FROM images GROUP BY digest" if unique else \
+            "SELECT path, mtime FROM images"
+        sql = (f"SELECT {columns} FROM images WHERE path IN "
+               f"(SELECT path FROM ({newest}) ORDER BY mtime DESC LIMIT ?)")
+        params = [-1 if limit is None else limit]
+        if search:
+            # Filename only, not the directory part of the path
+            sql += (" AND (instr(lower(substr(path, instr(path, ?) + 1)), ?) > 0"
+                    " OR instr(lower(coalesce(name, '')), ?) > 0)")
+            params += [os.sep, search.lower(), search.lower()]
+        return sql, params
+
+    def count(self, unique=True, search="", limit=None):
+        """Number of entries page() can return."""
+        sql, params = self._query("COUNT(*)", unique, search, limit)
+        with self.lock:
+            return self._connection().execute(sql, params).fetchone()[0]
+
+    def page(self, offset, page_size, unique=True, search="", limit=None):
+        """Entries newest first, page_size of them starting at offset."""
+        sql, params = self._query(", ".join(HistoryEntry._fields), unique, search, limit)
+        sql += " ORDER BY mtime DESC LIMIT ? OFFSET ?"
+        with self.lock:
+            rows = self._connection().execute(sql, params + [page_size, offset]).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+
+# Global history index instance
+history_index = HistoryIndex(HISTORY_INDEX_PATH, thumbnail_px=HISTORY_THUMBNAIL_PX)
@@ -0,0 +1,76 @@
+"""Shared HTTP session with connection pooling, timeouts and a response size cap."""
+
+import io
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image
+
+from config_manager import HTTP_TIMEOUT, HTTP_MAX_MB, HTTP_POOL_SIZE, HTTP_RETRIES
+
+logger = logging.getLogger("sticker_factory.http_client")
+
+
+class ResponseTooLarge(ValueError):
+    """Raised when a response body exceeds the size cap."""
+
+
+def make_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES):
+    """Session that keeps connections (and TLS sessions) alive and retries idempotent requests."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET", "HEAD"))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Global session, shared by all browser sessions and background threads
+session = make_session()
+
+
+def get(url, timeout=HTTP_TIMEOUT, max_bytes=HTTP_MAX_MB * 1024 * 1024, **kwargs):
+    """
+    GET url and return the response with its body read, at most max_bytes of it.
+
+    Raises requests exceptions on network and HTTP errors and
+    ResponseTooLarge if the body (announced or actual) is over the cap;
+    the download stops as soon as the cap is passed.
+    """
+    with session.get(url, timeout=timeout, stream=True, **kwargs) as response:
+        response.raise_for_status()
+        length = response.headers.get("content-length")
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise ResponseTooLarge(f"{url} is {int(length) / 1e6:.1f} MB, over the {max_bytes / 1e6:.1f} MB limit")
+        body = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            body += chunk
+            if len(body) > max_bytes:
+                raise ResponseTooLarge(f"{url} is over the {max_bytes / 1e6:.1f} MB limit")
+        # Hand the capped body to requests so .content, .text and .json() work as usual
+        response._content = bytes(body)
+        response._content_consumed = True
+        return response
+
+
+def get_json(url, **kwargs):
+    """GET url and decode its JSON body."""
+    return get(url, **kwargs).json()
+
+
+def get_image(url, **kwargs):
+    """
+    Download and decode an image.
+
+    Raises ValueError if the URL does not serve an image, plus the errors of get().
+    """
+    response = get(url, **kwargs)
+    content_type = response.headers.get('content-type', '')
+    if not content_type.startswith('image/'):
+        raise ValueError('URL does not point to a valid image')
+    image = Image.open(io.BytesIO(response.content))
+    image.load()
+    return image
@@ -1,40 +1,150 @@
 """Image processing and conversion utilities for the Sticker Factory."""
 
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from PIL import Image, ImageOps
 
-logger = logging.getLogger("sticker_factory.image_utils")
-
-
-def preper_image(image, label_width):
-    """Prepare image by resizing and dithering for thermal printer output."""
-    if image.mode == "RGBA":
-        background = Image.new("RGBA", image.size, "white")
-        image = Image.alpha_composite(background, image)
-        image = image.convert("RGB")
+from config_manager import PREPARED_CACHE_MAX_ENTRIES
 
-    width, height = image.size
-    if width != label_width:
-        new_height = int((label_width / width) * height)
-        image = image.resize((label_width, new_height))
-        logger.debug(f"Resizing image from ({width}, {height}) >> {image.size}")
+from dithering import DEFAULT_ALGORITHM, dither
+from tone_curve import ToneCurve
 
-    if image.mode != "L":
-        grayscale_image = image.convert("L")
-    else:
-        grayscale_image = image
+logger = logging.getLogger("sticker_factory.image_utils")
 
-    dithered_image = grayscale_image.convert("1", dither=Image.FLOYDSTEINBERG)
 
-    return grayscale_image, dithered_image
+def image_digest(image):
+    """Return a hex digest of the image mode, size and pixel data."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}|{image.size[0]}x{image.size[1]}|".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+class PreparedImage:
+    """
+    An image scaled to a label width, with its print variants computed on first use.
+
+    resized (RGB, transparency flattened onto white), grayscale and each
+    dithered(algorithm) are memoized, so a rerun that toggles between the
+    variants never resizes or dithers twice. The source image is released
+    once the resized copy exists; the variants never alias it. They are
+    shared through the cache, so callers that close or change an image
+    (print_image does in PRIVACY_MODE) must pass a copy.
+    """
+
+    def __init__(self, image, label_width):
+        self.label_width = label_width
+        self._source = image
+        self._resized = None
+        self._grayscale = None
+        self._dithered = {}
+        self._lock = threading.RLock()
+
+    @property
+    def resized(self):
+        with self._lock:
+            if self._resized is None:
+                image = self._source
+                if image.mode == "RGBA":
+                    background = Image.new("RGBA", image.size, "white")
+                    image = Image.alpha_composite(background, image)
+                    image = image.convert("RGB")
+
+                width, height = image.size
+                if width != self.label_width:
+                    new_height = int((self.label_width / width) * height)
+                    image = image.resize((self.label_width, new_height))
+                    logger.debug(f"Resizing image from ({width}, {height}) >> {image.size}")
+                if image is self._source:
+                    # Already print-ready; keep a copy so closing the caller's image can't reach the cache
+                    image = image.copy()
+                self._resized = image
+                self._source = None
+            return self._resized
+
+    @property
+    def grayscale(self):
+        with self._lock:
+            if self._grayscale is None:
+                resized = self.resized
+                self._grayscale = resized if resized.mode == "L" else resized.convert("L")
+            return self._grayscale
+
+    def dithered(self, algorithm=DEFAULT_ALGORITHM):
+        """1-bit version made with one of dithering.ALGORITHMS."""
+        with self._lock:
+            if algorithm not in self._dithered:
+                self._dithered[algorithm] = dither(self.grayscale, algorithm)
+            return self._dithered[algorithm]
+
+
+class PreparedImageCache:
+    """LRU of PreparedImage objects keyed by image content and label width."""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, image, label_width):
+        """Return the PreparedImage for image at label_width, creating it on a miss."""
+        key = (image_digest(image), label_width)
+        with self.lock:
+            prepared = self._entries.get(key)
+            if prepared is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return prepared
+            self.misses += 1
+        # Resize before sharing the entry: callers may close their image once
+        # they are done with it (PRIVACY_MODE does), so the cache must not keep it
+        prepared = PreparedImage(image, label_width)
+        prepared.resized
+        with self.lock:
+            prepared = self._entries.setdefault(key, prepared)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return prepared
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current usage."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Global prepared image cache, shared by all sessions
+prepared_image_cache = PreparedImageCache(max_entries=PREPARED_CACHE_MAX_ENTRIES)
+
+
+def prepare_image(image, label_width):
+    """Return the (cached) PreparedImage of image for a label width."""
+    return prepared_image_cache.get(image, label_width)
+
+
+def preper_image(image, label_width, algorithm=DEFAULT_ALGORITHM):
+    """Prepare image by resizing and dithering (see dithering.ALGORITHMS) for thermal printer output."""
+    prepared = prepare_image(image, label_width)
+    return prepared.grayscale, prepared.dithered(algorithm)
 
 
 def apply_threshold(image, threshold):
     """Apply threshold to convert image to black and white."""
-    if image.mode != 'L':
-        image = image.convert('L')
-    lut = [255 if i > threshold else 0 for i in range(256)]
-    return image.point(lut, mode='1')
+    return ToneCurve().threshold(threshold).apply(image)
 
 
 def resize_image_to_width(image, target_width_mm, label_width, current_dpi=300):
@@ -68,29 +178,12 @@ def add_border(image, border_width=1):
 
 def apply_levels(image, black_point=0, white_point=255):
     """Apply levels adjustment to an image."""
-    if image.mode != 'L':
-        image = image.convert('L')
-    
-    lut = []
-    for i in range(256):
-        if i <= black_point:
-            lut.append(0)
-        elif i >= white_point:
-            lut.append(255)
-        else:
-            normalized = (i - black_point) / (white_point - black_point)
-            lut.append(int(normalized * 255))
-    
-    return image.point(lut)
+    return ToneCurve().levels(black_point, white_point).apply(image)
 
 
 def apply_histogram_equalization(image, black_point=0, white_point=255):
     """Apply histogram equalization with levels adjustment to an image."""
-    if image.mode != 'L':
-        image = image.convert('L')
-    
-    leveled = apply_levels(image, black_point, white_point)
-    return ImageOps.equalize(leveled)
+    return ToneCurve().levels(black_point, white_point).equalize().apply(image)
 
 
 def img_concat_v(im1, im2, image_width):
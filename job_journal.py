@@ -0,0 +1,227 @@
+"""Append-only on-disk journal of print jobs, used to recover the queue after a restart."""
+
+import dataclasses
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Sequence
+from datetime import datetime
+from pathlib import Path
+
+from PIL import Image
+
+from pdf_pages import PdfPages
+
+logger = logging.getLogger("sticker_factory.job_journal")
+
+UNFINISHED_STATUSES = ("pending", "processing")
+
+
+def _json_safe(value):
+    """Convert job params into something json can store."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class JobJournal:
+    """
+    JSONL write-ahead log of job submissions, state transitions and timings.
+
+    Callers only enqueue records; a background thread appends them, flushes,
+    and fsyncs at most once per sync_interval. Images of submitted jobs are
+    kept next to the journal until the job finishes, so unfinished jobs can
+    be replayed; a PdfPages batch keeps the PDF and its page selection
+    instead of rendered pages, and is replayed as a PdfPages. The file is compacted once it grows past compact_lines.
+    """
+
+    def __init__(self, path, compact_lines=1000, sync_interval=2.0, retention_seconds=86400):
+        self.path = Path(path)
+        self.image_dir = self.path.parent / f"{self.path.stem}_images"
+        self.compact_lines = compact_lines
+        self.sync_interval = sync_interval
+        self.retention_seconds = retention_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.image_dir.mkdir(parents=True, exist_ok=True)
+        self._records = queue.Queue()
+        self._state = {}  # job id -> merged record, owned by the writer thread after load
+        self._line_count = 0
+        self._load()
+        self._writer_thread = threading.Thread(target=self._write_records, daemon=True)
+        self._writer_thread.start()
+
+    def record_submit(self, job):
+        """Queue a submission record; the job image is saved by the writer thread."""
+        self._records.put(({
+            "event": "submit",
+            "id": job.id,
+            "ts": job.created_at.isoformat(),
+            "params": _json_safe(job.params),
+            "priority": job.priority,
+            "session_id": job.session_id,
+            "pages": len(job.image) if isinstance(job.image, Sequence) else None,
+            "pdf": ({"pages": job.image.pages, "dpi": job.image.dpi, "width": job.image.width,
+                     "rotate": job.image.rotate} if isinstance(job.image, PdfPages) else None),
+        }, job.image))
+
+    def record_status(self, job):
+        """Queue a state transition record."""
+        self._records.put(({
+            "event": "status",
+            "id": job.id,
+            "ts": datetime.now().isoformat(),
+            "status": job.status,
+            "error": job.error,
+            "timings": dict(job.timings),
+        }, None))
+
+    def unfinished_jobs(self):
+        """Return (record, image) pairs for jobs that never reached a final state."""
+        jobs = []
+        for record in list(self._state.values()):
+            if record.get("status", "pending") not in UNFINISHED_STATUSES:
+                continue
+            try:
+                if record.get("pdf"):
+                    data = self._image_paths(record)[0].read_bytes()
+                    jobs.append((record, PdfPages(data, **record["pdf"])))
+                    continue
+                images = [self._load_image(path) for path in self._image_paths(record)]
+                jobs.append((record, images if record.get("pages") is not None else images[0]))
+            except Exception as e:
+                logger.warning(f"Cannot replay job {record['id']}, image unavailable: {e}")
+        return jobs
+
+    def _image_paths(self, record):
+        """Image file(s) of a job record; batch jobs store one file per image, PDF batches the PDF."""
+        job_id, pages = record["id"], record.get("pages")
+        if record.get("pdf"):
+            return [self.image_dir / f"{job_id}.pdf"]
+        if pages is None:
+            return [self.image_dir / f"{job_id}.png"]
+        return [self.image_dir / f"{job_id}_{index}.png" for index in range(pages)]
+
+    @staticmethod
+    def _load_image(path):
+        with Image.open(path) as image:
+            image.load()
+            return image.copy()
+
+    def _load(self):
+        """Fold the existing journal into the latest state per job."""
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                self._line_count += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line after a crash is expected
+                    logger.warning(f"Skipping corrupt journal line {self._line_count}")
+                    continue
+                self._merge(record)
+        logger.info(f"Loaded {len(self._state)} job(s) from journal {self.path}")
+
+    def _merge(self, record):
+        state = self._state.setdefault(record["id"], {"id": record["id"], "status": "pending"})
+        if record["event"] == "submit":
+            state["submitted"] = record["ts"]
+            state["params"] = record["params"]
+            state["priority"] = record.get("priority", 0)
+            state["session_id"] = record.get("session_id")
+            state["pages"] = record.get("pages")
+            state["pdf"] = record.get("pdf")
+        else:
+            state.update({key: record[key] for key in ("status", "error", "timings") if key in record})
+            state["updated"] = record["ts"]
+
+    def _write_records(self):
+        """Writer thread: append queued records, syncing and compacting in the background"""
+        last_sync = time.monotonic()
+        while True:
+            batch = []
+            try:
+                batch.append(self._records.get(timeout=self.sync_interval))
+                # Collect everything that arrives until the next sync is due
+                deadline = last_sync + self.sync_interval
+                while True:
+                    remaining = deadline - time.monotonic()
+                    batch.append(self._records.get(timeout=remaining) if remaining > 0 else
+                                 self._records.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                if batch:
+                    self._append(batch)
+                    last_sync = time.monotonic()
+                if self._line_count > self.compact_lines:
+                    self._compact()
+            except Exception as e:
+                logger.error(f"Error writing job journal: {e}")
+                time.sleep(1)  # Prevent tight loop on repeated errors
+
+    def _append(self, batch):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record, image in batch:
+                if image is not None:
+                    images = image if record.get("pages") is not None else [image]
+                    try:
+                        if record.get("pdf"):
+                            # Pages are rendered again from the PDF on replay, not here
+                            self._image_paths(record)[0].write_bytes(image.data)
+                        else:
+                            for page, path in zip(images, self._image_paths(record)):
+                                page.save(path, "PNG")
+                    except Exception as e:
+                        logger.warning(f"Could not journal image of job {record['id']}: {e}")
+                f.write(json.dumps(record) + "\n")
+                self._line_count += 1
+                self._merge(record)
+                if record.get("status") not in (None, *UNFINISHED_STATUSES):
+                    # Finished jobs are never replayed, so their images are not kept
+                    for path in self._image_paths(self._state[record["id"]]):
+                        path.unlink(missing_ok=True)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self):
+        """Rewrite the journal with one snapshot per job still worth keeping"""
+        now = datetime.now()
+        kept = {}
+        for job_id, state in self._state.items():
+            last_seen = state.get("updated") or state.get("submitted")
+            age = (now - datetime.fromisoformat(last_seen)).total_seconds() if last_seen else 0
+            if state.get("status") in UNFINISHED_STATUSES or age < self.retention_seconds:
+                kept[job_id] = state
+
+        tmp_path = self.path.with_suffix(".tmp")
+        lines = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for state in kept.values():
+                if "params" in state:
+                    f.write(json.dumps({"event": "submit", "id": state["id"], "ts": state.get("submitted"),
+                                        "params": state["params"], "priority": state.get("priority", 0),
+                                        "session_id": state.get("session_id"),
+                                        "pages": state.get("pages"), "pdf": state.get("pdf")}) + "\n")
+                    lines += 1
+                f.write(json.dumps({"event": "status", "id": state["id"], "ts": state.get("updated"),
+                                    "status": state.get("status"), "error": state.get("error"),
+                                    "timings": state.get("timings", {})}) + "\n")
+                lines += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        logger.info(f"Compacted job journal from {self._line_count} to {lines} lines")
+        self._state = kept
+        self._line_count = lines
@@ -2,37 +2,126 @@ import queue
 import threading
 import time
 import logging
-from dataclasses import dataclass
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List
+import itertools
 import uuid
 
+from raster_cache import raster_cache
+from job_journal import JobJournal
+from job_scheduler import FairScheduler
+from config_manager import (
+    QUEUE_PIPELINE,
+    QUEUE_PIPELINE_DEPTH,
+    QUEUE_RASTER_WORKERS,
+    QUEUE_JOURNAL,
+    QUEUE_JOURNAL_PATH,
+    QUEUE_JOURNAL_COMPACT_LINES,
+    QUEUE_SESSION_INFLIGHT_LIMIT,
+)
+
 logger = logging.getLogger("sticker_factory.job_queue")
 
+# Assumed seconds per job until a printer has completed one
+DEFAULT_JOB_SECONDS = 5.0
+
+
+class SessionLimitError(Exception):
+    """Raised when a session already has its maximum number of unfinished jobs."""
+
+
 @dataclass
 class PrintJob:
     id: str
-    image: Any  # PIL Image
+    image: Any  # PIL Image, or a sequence of them (list, pdf_pages.PdfPages) for a batch job
     params: Dict[str, Any]
     status: str = "pending"  # pending, processing, completed, failed
     error: Optional[str] = None
     created_at: datetime = None
     completed_at: datetime = None
+    # Seconds spent waiting, rasterizing, buffered between stages and sending
+    timings: Dict[str, float] = field(default_factory=dict)
+    queued_at: float = field(default_factory=time.monotonic, repr=False)
+    dispatch_order: int = field(default=0, repr=False)  # when a worker took the job off the sub-queue
+    priority: int = 0  # higher prints first
+    session_id: Optional[str] = None
+    progress: Dict[str, int] = field(default_factory=lambda: {"printed": 0, "total": 1})
+    done: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+    callbacks: List[Callable[["PrintJob"], None]] = field(default_factory=list, repr=False, compare=False)
 
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.now()
+        pages = len(self.image) if isinstance(self.image, Sequence) else 1
+        self.progress["total"] = pages * self.params.get("copies", 1)
 
 class PrintQueue:
-    def __init__(self):
-        self.queue = queue.Queue()
+    """
+    Dispatches jobs to one sub-queue and worker per printer identifier.
+
+    In pipeline mode each printer gets a rasterize stage and a send stage.
+    The rasterize stage converts upcoming jobs on a shared thread pool while
+    the send stage streams the current job to the printer; a bounded buffer
+    of pipeline_depth jobs between them caps memory use.
+
+    Each printer's sub-queue is a FairScheduler: jobs are ordered by priority
+    and then round robin across sessions, and a session may have at most
+    session_inflight_limit unfinished jobs.
+    """
+
+    def __init__(self, pipeline=QUEUE_PIPELINE, pipeline_depth=QUEUE_PIPELINE_DEPTH,
+                 raster_workers=QUEUE_RASTER_WORKERS, journal=None,
+                 session_inflight_limit=QUEUE_SESSION_INFLIGHT_LIMIT):
         self.jobs = {}  # Store all jobs for status tracking
         self.lock = threading.Lock()
-        self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
-        self.worker_thread.start()
-        self.is_processing = False
+        self.session_inflight_limit = session_inflight_limit
+        self.job_seconds = {}  # printer identifier -> moving average of seconds per job
+        self.printer_queues = {}  # printer identifier -> FairScheduler
+        self.workers = {}  # printer identifier -> worker threads
+        self.processing = {}  # printer identifier -> bool
+        self.pipeline = pipeline
+        self.pipeline_depth = max(1, pipeline_depth)
+        self.send_buffers = {}  # printer identifier -> bounded queue of (job, future)
+        self._dispatch_counter = itertools.count(1)
+        self.raster_pool = (
+            ThreadPoolExecutor(max_workers=raster_workers, thread_name_prefix="rasterize")
+            if pipeline else None
+        )
+        self.journal = journal
         self._cleanup_thread = threading.Thread(target=self._cleanup_old_jobs, daemon=True)
         self._cleanup_thread.start()
+        if self.journal:
+            self._replay_journal()
+
+    @property
+    def is_processing(self):
+        return any(self.processing.values())
+
+    def _get_printer_queue(self, identifier):
+        """Return the sub-queue for a printer, starting its worker on first use. Caller holds the lock."""
+        if identifier not in self.printer_queues:
+            self.printer_queues[identifier] = FairScheduler()
+            self.processing[identifier] = False
+            if self.pipeline:
+                self.send_buffers[identifier] = queue.Queue(maxsize=self.pipeline_depth)
+                stages = [("rasterize", self._rasterize_stage), ("send", self._send_stage)]
+            else:
+                stages = [("worker", self._process_queue)]
+            self.workers[identifier] = []
+            for stage_name, target in stages:
+                worker = threading.Thread(
+                    target=target,
+                    args=(identifier,),
+                    name=f"print-{stage_name}-{identifier}",
+                    daemon=True,
+                )
+                self.workers[identifier].append(worker)
+                worker.start()
+            logger.info(f"Started print worker for {identifier}")
+        return self.printer_queues[identifier]
 
     def _cleanup_old_jobs(self):
         """Periodically clean up old completed jobs"""
@@ -47,22 +136,99 @@ class PrintQueue:
                         (now - job.created_at).total_seconds() < 86400)
                 }
 
-    def add_job(self, image, **params) -> str:
-        """Add a new print job to the queue"""
+    def add_job(self, image, priority=0, session_id=None, **params) -> str:
+        """Add a new print job to its printer's queue"""
         job_id = str(uuid.uuid4())
         job = PrintJob(
             id=job_id,
             image=image,
-            params=params
+            params=params,
+            priority=priority,
+            session_id=session_id,
         )
-        self.jobs[job_id] = job
-        self.queue.put(job)
+        with self.lock:
+            # Checked and registered under one lock, so concurrent submits can't both pass the limit
+            if session_id is not None and self.session_inflight_limit:
+                unfinished = sum(
+                    1 for other in self.jobs.values()
+                    if other.session_id == session_id and other.status in ["pending", "processing"]
+                )
+                if unfinished >= self.session_inflight_limit:
+                    raise SessionLimitError(
+                        f"You already have {unfinished} job(s) in the queue, please wait for them to print"
+                    )
+            self.jobs[job_id] = job
+        if self.journal:
+            self.journal.record_submit(job)
+        self._enqueue(job)
         return job_id
 
+    def _enqueue(self, job):
+        identifier = job.params["printer_info"]["identifier"]
+        with self.lock:
+            self.jobs[job.id] = job
+            printer_queue = self._get_printer_queue(identifier)
+        printer_queue.put(job)
+
+    def _record_status(self, job):
+        if self.journal:
+            self.journal.record_status(job)
+
+    def _replay_journal(self):
+        """Requeue jobs the journal shows were still pending when the app stopped"""
+        for record, image in self.journal.unfinished_jobs():
+            if not record.get("params") or not record.get("submitted"):
+                # Only status records survived (truncated or compacted journal); nothing to print
+                logger.warning(f"Cannot replay job {record['id']}, its submit record is missing")
+                continue
+            if record["status"] == "processing":
+                logger.warning(f"Job {record['id']} was interrupted while printing and will be printed again")
+            params = dict(record["params"])
+            params["temp_file_path"] = None
+            job = PrintJob(
+                id=record["id"],
+                image=image,
+                params=params,
+                status="pending",
+                created_at=datetime.fromisoformat(record["submitted"]),
+                priority=record.get("priority", 0),
+                session_id=record.get("session_id"),
+            )
+            self._record_status(job)
+            self._enqueue(job)
+            logger.info(f"Replayed job {job.id} for {params['printer_info']['identifier']}")
+
     def get_job_status(self, job_id: str) -> Optional[PrintJob]:
         """Get the status of a specific job"""
         return self.jobs.get(job_id)
 
+    def wait_for_job(self, job_id: str, timeout: Optional[float] = None) -> bool:
+        """Block until the job is completed or failed; returns False if the timeout expired first"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return job.done.wait(timeout)
+
+    def add_done_callback(self, job_id: str, callback: Callable[[PrintJob], None]):
+        """Call callback(job) on the worker thread once the job finishes, or right away if it already has"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        with self.lock:
+            if not job.done.is_set():
+                job.callbacks.append(callback)
+                return
+        callback(job)
+
+    def _line_order(self, identifier):
+        """Jobs of one printer in the order they will finish: in flight first, then waiting. Caller holds the lock."""
+        in_flight = sorted(
+            (job for job in self.jobs.values()
+             if job.status == "processing" and job.params["printer_info"]["identifier"] == identifier),
+            key=lambda job: job.dispatch_order,
+        )
+        return in_flight + self.printer_queues[identifier].snapshot()
+
     def get_queue_status(self):
         """Get overall queue status"""
         with self.lock:
@@ -84,64 +250,187 @@ class PrintQueue:
                 reverse=True
             ))
 
+            # Position 1 is printing now; the wait estimate covers the jobs ahead
+            positions = {}
+            for identifier in self.printer_queues:
+                job_seconds = self.job_seconds.get(identifier, DEFAULT_JOB_SECONDS)
+                for index, job in enumerate(self._line_order(identifier)):
+                    positions[job.id] = (index + 1, index * job_seconds)
+
+            printers = {
+                identifier: {
+                    "queue_size": printer_queue.qsize(),
+                    "is_processing": self.processing[identifier],
+                    "buffered": self.send_buffers[identifier].qsize() if self.pipeline else 0,
+                    "seconds_per_job": self.job_seconds.get(identifier, DEFAULT_JOB_SECONDS),
+                }
+                for identifier, printer_queue in self.printer_queues.items()
+            }
+
             return {
-                "queue_size": self.queue.qsize(),
+                "queue_size": sum(p["queue_size"] for p in printers.values()),
                 "is_processing": self.is_processing,
+                "printers": printers,
+                "raster_cache": raster_cache.stats(),
                 "jobs": {
                     job_id: {
                         "status": job.status,
+                        "printer": job.params["printer_info"]["identifier"],
+                        "session_id": job.session_id,
+                        "priority": job.priority,
+                        "position": positions.get(job_id, (None, None))[0],
+                        "estimated_wait": positions.get(job_id, (None, None))[1],
                         "created_at": job.created_at,
                         "completed_at": job.completed_at,
-                        "error": job.error
+                        "error": job.error,
+                        "timings": dict(job.timings),
+                        "progress": dict(job.progress),
                     } for job_id, job in sorted_jobs.items()
                 }
             }
 
-    def _process_queue(self):
-        """Worker thread to process print jobs"""
-        while True:
+    def _rasterize(self, job):
+        """Convert a job to raster instructions, recording how long it waited and took"""
+        # Import here to make it mockable in tests
+        from printer_utils import rasterize_print_job, debug_enabled
+
+        start = time.monotonic()
+        job.timings["wait"] = start - job.queued_at
+        try:
+            return rasterize_print_job(
+                job.image,
+                job.params["printer_info"],
+                job.params.get("temp_file_path"),
+                rotate=job.params.get("rotate", 0),
+                dither=job.params.get("dither", False),
+                dither_algorithm=job.params.get("dither_algorithm"),
+                label_type=job.params.get("label_type", "102"),
+                debug=debug_enabled(),
+                copies=job.params.get("copies", 1),
+                cut_each=job.params.get("cut_each", True),
+            )
+        finally:
+            job.timings["rasterize"] = time.monotonic() - start
+
+    def _send(self, job, instructions):
+        """Send a rasterized job, recording buffer wait and transfer time"""
+        from printer_utils import send_print_job, debug_enabled
+
+        start = time.monotonic()
+        job.timings["buffered"] = max(0.0, start - job.queued_at - job.timings.get("wait", 0.0)
+                                      - job.timings.get("rasterize", 0.0))
+        try:
+            return send_print_job(
+                instructions,
+                job.params["printer_info"],
+                debug=debug_enabled(),
+                pages=job.progress["total"],
+                on_progress=lambda printed: job.progress.update(printed=printed),
+            )
+        finally:
+            job.timings["send"] = time.monotonic() - start
+
+    def _finish(self, job, success, error):
+        identifier = job.params["printer_info"]["identifier"]
+        with self.lock:
+            if success:
+                job.status = "completed"
+                job.completed_at = datetime.now()
+                # Printer throughput is bounded by the slower of the two stages
+                seconds = max(job.timings.get("rasterize", 0.0), job.timings.get("send", 0.0))
+                previous = self.job_seconds.get(identifier)
+                self.job_seconds[identifier] = seconds if previous is None else 0.7 * previous + 0.3 * seconds
+            else:
+                job.status = "failed"
+                job.error = error
+            job.done.set()
+            callbacks, job.callbacks = job.callbacks, []
+        self._record_status(job)
+        logger.debug(f"Job {job.id} {job.status}, timings: "
+                     + ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in job.timings.items()))
+        for callback in callbacks:
             try:
-                job = self.queue.get()
-                if job is None:
-                    continue
+                callback(job)
+            except Exception as e:
+                logger.error(f"Error in done callback of job {job.id}: {e}")
 
+    def _process_queue(self, identifier):
+        """Worker thread to rasterize and send the print jobs of one printer in sequence"""
+        printer_queue = self.printer_queues[identifier]
+        while True:
+            try:
+                printer_queue.wait()
+                # Taken off the queue and marked under the lock, so get_queue_status always sees the job
                 with self.lock:
-                    self.is_processing = True
+                    job = printer_queue.get()
+                    if job is None:
+                        continue
+                    self.processing[identifier] = True
                     job.status = "processing"
+                self._record_status(job)
 
                 try:
-                    # Import here to make it mockable in tests
-                    from printer_utils import process_print_job
-                    
-                    # Process the print job using our printer handler
-                    success, error = process_print_job(
-                        job.image,
-                        job.params["printer_info"],
-                        job.params["temp_file_path"],
-                        rotate=job.params.get("rotate", 0),
-                        dither=job.params.get("dither", False),
-                        label_type=job.params.get("label_type", "102")
-                    )
+                    instructions = self._rasterize(job)
+                    success, error = self._send(job, instructions)
+                except Exception as e:
+                    success, error = False, f"Unexpected error during printing: {str(e)}"
+                    logger.error(f"Error processing job {job.id}: {e}")
+                finally:
+                    self.processing[identifier] = False
+                    printer_queue.task_done()
+                self._finish(job, success, error)
+
+            except Exception as e:
+                logger.error(f"Error in queue processor: {e}")
+                time.sleep(1)  # Prevent tight loop on repeated errors
+
+    def _rasterize_stage(self, identifier):
+        """Pipeline stage: hand upcoming jobs of one printer to the raster pool"""
+        printer_queue = self.printer_queues[identifier]
+        send_buffer = self.send_buffers[identifier]
+        while True:
+            try:
+                printer_queue.wait()
+                with self.lock:  # as in _process_queue
+                    job = printer_queue.get()
+                    if job is None:
+                        continue
+                    job.status = "processing"
+                    # The send stage takes jobs in this order, not in submission order
+                    job.dispatch_order = next(self._dispatch_counter)
+                self._record_status(job)
+
+                # Blocks while pipeline_depth jobs are already waiting to be sent
+                send_buffer.put((job, self.raster_pool.submit(self._rasterize, job)))
+                printer_queue.task_done()
 
-                    if success:
-                        job.status = "completed"
-                        job.completed_at = datetime.now()
-                    else:
-                        job.status = "failed"
-                        job.error = error
+            except Exception as e:
+                logger.error(f"Error in rasterize stage: {e}")
+                time.sleep(1)  # Prevent tight loop on repeated errors
 
+    def _send_stage(self, identifier):
+        """Pipeline stage: send rasterized jobs of one printer in the order they were dispatched"""
+        send_buffer = self.send_buffers[identifier]
+        while True:
+            try:
+                job, future = send_buffer.get()
+                try:
+                    instructions = future.result()
+                    self.processing[identifier] = True
+                    success, error = self._send(job, instructions)
                 except Exception as e:
-                    job.status = "failed"
-                    job.error = str(e)
+                    success, error = False, f"Unexpected error during printing: {str(e)}"
                     logger.error(f"Error processing job {job.id}: {e}")
-
                 finally:
-                    self.is_processing = False
-                    self.queue.task_done()
+                    self.processing[identifier] = False
+                    send_buffer.task_done()
+                self._finish(job, success, error)
 
             except Exception as e:
-                logger.error(f"Error in queue processor: {e}")
+                logger.error(f"Error in send stage: {e}")
                 time.sleep(1)  # Prevent tight loop on repeated errors
 
 # Global print queue instance
-print_queue = PrintQueue() 
\ No newline at end of file
+print_queue = PrintQueue(
+    journal=JobJournal(QUEUE_JOURNAL_PATH, compact_lines=QUEUE_JOURNAL_COMPACT_LINES) if QUEUE_JOURNAL else None
+) 
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""Priority and per-session fair-share scheduling for print jobs."""
+
+import threading
+from collections import OrderedDict, deque
+
+
+class FairScheduler:
+    """
+    Blocking job queue for one printer.
+
+    Higher priority jobs always go first. Within a priority level, sessions
+    take turns (round robin), so one visitor queueing many jobs cannot starve
+    everyone else; jobs of a single session keep their submission order.
+    Drop-in for the queue.Queue methods the print workers use.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._levels = {}  # priority -> OrderedDict(session id -> deque of jobs)
+        self._size = 0
+
+    def put(self, job):
+        with self._cond:
+            sessions = self._levels.setdefault(job.priority, OrderedDict())
+            sessions.setdefault(job.session_id, deque()).append(job)
+            self._size += 1
+            self._cond.notify()
+
+    def get(self):
+        """Remove and return the next job, blocking until one is available."""
+        with self._cond:
+            while self._size == 0:
+                self._cond.wait()
+            priority = max(self._levels)
+            sessions = self._levels[priority]
+            session_id, jobs = next(iter(sessions.items()))
+            job = jobs.popleft()
+            if jobs:
+                # This session goes to the back of the line for its next job
+                sessions.move_to_end(session_id)
+            else:
+                del sessions[session_id]
+            if not sessions:
+                del self._levels[priority]
+            self._size -= 1
+            return job
+
+    def wait(self):
+        """Block until a job is waiting, without taking it."""
+        with self._cond:
+            while self._size == 0:
+                self._cond.wait()
+
+    def qsize(self):
+        with self._cond:
+            return self._size
+
+    def task_done(self):
+        pass
+
+    def snapshot(self):
+        """Return waiting jobs in the order get() would hand them out."""
+        with self._cond:
+            order = []
+            for priority in sorted(self._levels, reverse=True):
+                lanes = [list(jobs) for jobs in self._levels[priority].values()]
+                # Replay the round robin without touching the real queues
+                for turn in range(max(len(lane) for lane in lanes)):
+                    order.extend(lane[turn] for lane in lanes if turn < len(lane))
+            return order
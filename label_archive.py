@@ -0,0 +1,123 @@
+"""Content-addressed archive of printed labels with a print log and a disk quota."""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from config_manager import ARCHIVE_DIR, ARCHIVE_LOG_PATH, ARCHIVE_QUOTA_MB, ARCHIVE_COMPRESS_LEVEL
+from history_index import history_index
+from image_utils import image_digest
+
+logger = logging.getLogger("sticker_factory.label_archive")
+
+# Archive files are named by the digest of their pixels; other files in the directory are left alone
+_BLOB_NAME = re.compile(r"^[0-9a-f]{32}\.png$")
+
+
+class LabelArchive:
+    """
+    Archived label images stored once per distinct content.
+
+    store() names the PNG after image_digest, so printing the same label
+    again writes nothing; it only bumps the file's mtime and appends an
+    event to the reference log (one JSON line per store: time, event,
+    digest, source, name). name is the filename the image came with; it
+    is also kept in the history index, so the gallery search finds it.
+    The mtime is the last use, which makes the quota an LRU: when the
+    archive grows past quota_bytes, the least recently used files are
+    deleted (and logged as "evict"). compress_level is the PNG zlib
+    level, trading CPU on the print worker for disk space.
+    """
+
+    def __init__(self, directory, log_path, quota_bytes=0, compress_level=6):
+        self.directory = directory
+        self.log_path = log_path
+        self.quota_bytes = quota_bytes
+        self.compress_level = compress_level
+        self.lock = threading.Lock()
+        self._blobs = None  # filename -> (last use, size), read from disk on first use
+
+    def _load(self):
+        if self._blobs is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._blobs = {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and _BLOB_NAME.match(entry.name):
+                        stat = entry.stat()
+                        self._blobs[entry.name] = (stat.st_mtime, stat.st_size)
+        return self._blobs
+
+    def _log(self, event, digest, **fields):
+        record = {"ts": time.time(), "event": event, "digest": digest, **fields}
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.error(f"Could not write archive log {self.log_path}: {e}")
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def store(self, image, source="print", name=None):
+        """Archive image (or reuse the existing copy) and return its filename."""
+        digest = image_digest(image)
+        filename = f"{digest}.png"
+        path = self.path(filename)
+        with self.lock:
+            blobs = self._load()
+            if filename in blobs and os.path.exists(path):
+                os.utime(path)
+                event = "reuse"
+            else:
+                tmp_path = f"{path}.tmp"
+                image.save(tmp_path, "PNG", compress_level=self.compress_level)
+                os.replace(tmp_path, path)
+                event = "store"
+            stat = os.stat(path)
+            blobs[filename] = (stat.st_mtime, stat.st_size)
+            self._log(event, digest, source=source, name=name, bytes=stat.st_size)
+            evicted = self._evict(keep=filename)
+        history_index.add(path, image, name=name)
+        for evicted_path in evicted:
+            history_index.remove(evicted_path)
+        return filename
+
+    def _evict(self, keep):
+        """Delete least recently used files until the archive fits the quota; returns their paths."""
+        if not self.quota_bytes:
+            return []
+        total = sum(size for _, size in self._blobs.values())
+        evicted = []
+        for filename, (_, size) in sorted(self._blobs.items(), key=lambda item: item[1][0]):
+            if total <= self.quota_bytes:
+                break
+            if filename == keep:
+                continue
+            try:
+                os.remove(self.path(filename))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Could not evict {filename}: {e}")
+                continue
+            del self._blobs[filename]
+            total -= size
+            evicted.append(self.path(filename))
+            self._log("evict", filename[:-4], bytes=size)
+        if evicted:
+            logger.info(f"Archive over quota: evicted {len(evicted)} label(s), {total / 1e6:.1f} MB left")
+        return evicted
+
+    def usage(self):
+        """Return (files, bytes) currently archived."""
+        with self.lock:
+            blobs = self._load()
+            return len(blobs), sum(size for _, size in blobs.values())
+
+
+# Global label archive instance
+label_archive = LabelArchive(ARCHIVE_DIR, ARCHIVE_LOG_PATH, ARCHIVE_QUOTA_MB * 1024 * 1024, ARCHIVE_COMPRESS_LEVEL)
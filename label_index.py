@@ -0,0 +1,64 @@
+"""Lookup tables over brother_ql's printer models and label definitions, built once at import."""
+
+from brother_ql import labels
+from brother_ql.labels import FormFactor
+from brother_ql.models import ModelsManager
+
+# USB product id -> model identifier (e.g. 0x2028 -> "QL-570")
+MODELS_BY_PRODUCT_ID = {model.product_id: model.identifier for model in ModelsManager().iter_elements()}
+
+# Label identifier -> brother_ql Label (tape_size, form_factor, dots_printable, ...)
+LABELS_BY_ID = {label.identifier: label for label in labels.ALL_LABELS}
+
+# Media width in mm as reported by the printer -> label identifiers of that width.
+# Continuous tape whose identifier is the width itself ("62") comes first, then
+# other continuous tape, then die-cut and round labels.
+LABEL_IDS_BY_WIDTH_MM = {}
+for _label in sorted(
+    labels.ALL_LABELS,
+    key=lambda label: (label.identifier != str(label.tape_size[0]), label.form_factor != FormFactor.ENDLESS),
+):
+    LABEL_IDS_BY_WIDTH_MM.setdefault(_label.tape_size[0], []).append(_label.identifier)
+    if _label.identifier.isdigit() and int(_label.identifier) != _label.tape_size[0]:
+        # Printers report 103 mm tape as 103, brother_ql sizes the "103" label as 104 mm
+        LABEL_IDS_BY_WIDTH_MM.setdefault(int(_label.identifier), []).insert(0, _label.identifier)
+del _label
+
+
+def model_for_product_id(product_id):
+    """Return the model identifier for a USB product id (int or hex string), or None if unknown."""
+    if isinstance(product_id, str):
+        product_id = int(product_id, 16)
+    return MODELS_BY_PRODUCT_ID.get(product_id)
+
+
+def get_label(label_type):
+    """Return the brother_ql Label for an identifier; raises ValueError if there is none."""
+    try:
+        return LABELS_BY_ID[label_type]
+    except KeyError:
+        raise ValueError(f"Label type {label_type} not found in label definitions") from None
+
+
+def label_dots(label_type):
+    """Return the printable (width, height) in dots of a label type; height 0 means continuous."""
+    return get_label(label_type).dots_printable
+
+
+def labels_for_width(width_mm, model=None):
+    """Return label identifiers for a media width, best match first, optionally limited to those model supports."""
+    candidates = LABEL_IDS_BY_WIDTH_MM.get(width_mm, [])
+    if model is None:
+        return list(candidates)
+    return [
+        label_type for label_type in candidates
+        if not LABELS_BY_ID[label_type].restricted_to_models or model in LABELS_BY_ID[label_type].restricted_to_models
+    ]
+
+
+def label_type_for_width(width_mm, model=None):
+    """Return the continuous label type printed on media of width_mm, or None."""
+    for label_type in labels_for_width(width_mm, model):
+        if LABELS_BY_ID[label_type].form_factor == FormFactor.ENDLESS:
+            return label_type
+    return None
@@ -0,0 +1,78 @@
+"""Text label layout and rendering, independent of Streamlit (usable from batch jobs and benchmarks)."""
+
+import logging
+from collections import namedtuple
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+from config_manager import LAYOUT_CACHE_MAX_ENTRIES
+from font_cache import get_font
+
+logger = logging.getLogger("sticker_factory.label_layout")
+
+ALIGNMENTS = ("left", "center", "right")
+
+# One laid out line: text drawn with its origin at (x, y), taking height pixels
+LineBox = namedtuple("LineBox", ["text", "x", "y", "width", "height"])
+
+
+class Layout(namedtuple("Layout", ["width", "height", "lines", "font_path", "size"])):
+    """Positions of every line of a label; render() draws them."""
+
+    def render(self):
+        """Draw the layout black on white into an RGB image of exactly width x height."""
+        font = get_font(self.font_path, self.size)
+        img = Image.new("RGB", (self.width, self.height), color="white")
+        draw = ImageDraw.Draw(img)
+        for line in self.lines:
+            if line.width:
+                draw.text((line.x, line.y), line.text, font=font, fill=(0, 0, 0))
+        return img
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_MAX_ENTRIES)
+def measure_run(font_path, size, text):
+    """
+    Return (width, height) of a run of text in the font, measured once per (font, size, text).
+
+    Blank runs are 0 wide and one line (ascent + descent) high; a run is at
+    least one line high so short lines like "..." keep the line pitch.
+    """
+    font = get_font(font_path, size)
+    ascent, descent = font.getmetrics()
+    font_height = ascent + descent
+    if not text.strip():
+        return 0, font_height
+    left, top, right, bottom = font.getbbox(text)
+    return right - left, max(bottom - top, font_height)
+
+
+def layout_text(text, width, font_path, size, alignment="center", line_spacing=20, padding=20):
+    """
+    Lay out text one line per "\\n" across width pixels.
+
+    Every line is measured once (runs are cached across calls); the
+    layout's height is exactly what the lines need, plus padding above and
+    below. font_path None uses Pillow's default font.
+    """
+    if alignment not in ALIGNMENTS:
+        raise ValueError(f"Unknown alignment: {alignment}")
+    lines = []
+    y = padding
+    for line in text.split("\n"):
+        line_width, line_height = measure_run(font_path, size, line)
+        if alignment == "center":
+            x = (width - line_width) // 2
+        elif alignment == "right":
+            x = width - line_width
+        else:
+            x = 0
+        lines.append(LineBox(line, x, y, line_width, line_height))
+        y += line_height + line_spacing
+    return Layout(width, y + padding, tuple(lines), font_path, size)
+
+
+def render_text_label(text, width, font_path, size, alignment="center", line_spacing=20, padding=20):
+    """Lay out and render a text label in one pass; see layout_text."""
+    return layout_text(text, width, font_path, size, alignment, line_spacing, padding).render()
@@ -0,0 +1,118 @@
+"""Lazy, label-width page sequences of multi-page PDFs for batch printing."""
+
+import io
+import logging
+from collections.abc import Sequence
+
+from PIL import Image
+
+from app_cache import content_hash
+from config_manager import PDF_PAGE_CACHE_MAX_ENTRIES, PDF_PAGE_CACHE_MAX_MB
+from image_utils import PreparedImage
+from bytes_lru import BytesLRU
+
+logger = logging.getLogger("sticker_factory.pdf_pages")
+
+# Prepared pages as PNG bytes, keyed by document hash, page, DPI, width and rotation
+page_cache = BytesLRU(
+    max_entries=PDF_PAGE_CACHE_MAX_ENTRIES,
+    max_bytes=PDF_PAGE_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def parse_page_range(text, page_count):
+    """
+    Turn "1-3, 5, 8-" (1-based, inclusive) into 0-based page indexes.
+
+    "all" or an empty string selects every page; open ranges run to the
+    first or last page. Raises ValueError for text that is not a range or
+    pages outside 1..page_count.
+    """
+    text = text.strip().lower()
+    if text in ("", "all"):
+        return list(range(page_count))
+    pages = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        try:
+            start = int(first) if first.strip() else 1
+            end = (int(last) if last.strip() else page_count) if dash else start
+        except ValueError:
+            raise ValueError(f"Not a page range: {part!r}") from None
+        if not 1 <= start <= end <= page_count:
+            raise ValueError(f"Pages {part!r} outside 1-{page_count}")
+        pages.extend(range(start - 1, end))
+    if not pages:
+        raise ValueError("No pages selected")
+    return pages
+
+
+class PdfPages(Sequence):
+    """
+    Selected pages of a PDF, rendered one at a time when iterated.
+
+    Each page is rendered at dpi, rotated and scaled to the label width
+    (grayscale, as PreparedImage.grayscale), so it is ready for convert.
+    Iterating keeps only the current page in memory; rendered pages are
+    kept PNG-encoded in page_cache, so iterating again (raster conversion,
+    then archiving) does not render twice. A print job accepts a PdfPages
+    wherever it accepts a list of images; digest identifies the selection
+    for the raster cache without rendering anything.
+    """
+
+    def __init__(self, data, pages, dpi, width, rotate=0):
+        self.data = data
+        self.pages = list(pages)
+        self.dpi = dpi
+        self.width = width
+        self.rotate = rotate
+        self.document_hash = content_hash(data)
+
+    @property
+    def digest(self):
+        pages = ",".join(map(str, self.pages))
+        return f"pdf:{self.document_hash}|{pages}|{self.dpi}|{self.width}|{self.rotate}"
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PdfPages(self.data, self.pages[index], self.dpi, self.width, self.rotate)
+        return next(self._render([self.pages[index]]))
+
+    def __iter__(self):
+        return self._render(self.pages)
+
+    def _key(self, page):
+        return f"{self.document_hash}|{page}|{self.dpi}|{self.width}|{self.rotate}"
+
+    def _render(self, pages):
+        document = None
+        try:
+            for page in pages:
+                data = page_cache.get(self._key(page))
+                if data is not None:
+                    yield Image.open(io.BytesIO(data))
+                    continue
+                if document is None:
+                    import fitz  # PyMuPDF
+
+                    document = fitz.open(stream=self.data, filetype="pdf")
+                pix = document.load_page(page).get_pixmap(dpi=self.dpi)
+                image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples) if not pix.alpha else \
+                    Image.frombytes("RGBA", (pix.width, pix.height), pix.samples)
+                del pix
+                if self.rotate:
+                    image = image.rotate(self.rotate, expand=True)
+                image = PreparedImage(image, self.width).grayscale
+                buffer = io.BytesIO()
+                image.save(buffer, "PNG")
+                page_cache.put(self._key(page), buffer.getvalue())
+                yield image
+        finally:
+            if document is not None:
+                document.close()
@@ -0,0 +1,59 @@
+"""Small, cached browser previews of label images; the full-size image stays with the print path."""
+
+import io
+import logging
+
+from PIL import Image
+
+from config_manager import PREVIEW_WIDTH, PREVIEW_CACHE_MAX_ENTRIES, PREVIEW_CACHE_MAX_MB
+from image_utils import image_digest
+from bytes_lru import BytesLRU
+
+logger = logging.getLogger("sticker_factory.preview")
+
+# Encoded previews, keyed by image digest and width
+preview_cache = BytesLRU(
+    max_entries=PREVIEW_CACHE_MAX_ENTRIES,
+    max_bytes=PREVIEW_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def downscale(image, width=None):
+    """
+    Return image scaled down to at most width pixels wide (never up).
+
+    1-bit images are box-averaged by a whole factor into grayscale, which
+    keeps the overall tone of the dither pattern instead of aliasing it.
+    """
+    width = width or PREVIEW_WIDTH
+    if image.width <= width:
+        return image
+    if image.mode == "1":
+        factor = -(-image.width // width)
+        return image.convert("L").reduce(factor)
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode_preview(image):
+    """Encode a preview compactly: PNG for line art and transparency, JPEG for photos."""
+    buffer = io.BytesIO()
+    if image.mode in ("1", "LA", "P", "RGBA") or image.getcolors(256) is not None:
+        # Few colors (text labels, 1-bit output): PNG is small and keeps edges sharp
+        image.save(buffer, "PNG")
+    else:
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def preview(image, width=None):
+    """Encoded preview bytes of image for st.image, cached by content and width."""
+    width = width or PREVIEW_WIDTH
+    key = f"{image_digest(image)}|{width}"
+    data = preview_cache.get(key)
+    if data is None:
+        data = encode_preview(downscale(image, width))
+        preview_cache.put(key, data)
+    return data
@@ -0,0 +1,262 @@
+"""Persistent per-printer backend connections for the Sticker Factory."""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import usb.core
+from brother_ql.backends import backend_factory
+from brother_ql.reader import interpret_response
+
+from config_manager import PRINTER_IDLE_TIMEOUT
+
+logger = logging.getLogger("sticker_factory.printer_connection")
+
+USB_TIMEOUT_ERRNO = 110
+STATUS_REQUEST = b"\x1b\x69\x53"  # ESC i S, status information request
+
+
+class PrinterBusyError(TimeoutError):
+    """The printer's connection is held by another job."""
+
+
+def _is_usb_timeout(error):
+    return isinstance(error, usb.core.USBError) and error.errno == USB_TIMEOUT_ERRNO
+
+
+class PrinterConnection:
+    """One open backend handle for a single printer identifier."""
+
+    def __init__(self, identifier, backend_name):
+        self.identifier = identifier
+        self.backend_name = backend_name
+        self.handle = None
+        self.last_used = time.monotonic()
+        self.lock = threading.RLock()
+
+    def open(self):
+        """Return the open backend handle, opening the device if needed."""
+        if self.handle is None:
+            backend = backend_factory(self.backend_name)
+            device = self.identifier
+            # Open by device instance when discovery provides one, so several
+            # printers of the same model are not confused with each other
+            for available in backend["list_available_devices"]():
+                if available["identifier"] == self.identifier and available["instance"] is not None:
+                    device = available["instance"]
+                    break
+            self.handle = backend["backend_class"](device)
+            logger.info(f"Opened {self.backend_name} connection to {self.identifier}")
+        self.last_used = time.monotonic()
+        return self.handle
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.dispose()
+            self.handle = None
+            logger.info(f"Closed connection to {self.identifier}")
+
+    def read(self):
+        """Read one response, treating a USB read timeout as no data."""
+        try:
+            return self.open().read()
+        except usb.core.USBError as e:
+            if _is_usb_timeout(e):
+                return b""
+            raise
+
+
+class PrinterConnectionManager:
+    """Keeps one backend handle open per printer and reuses it across jobs."""
+
+    def __init__(self, idle_timeout=60):
+        self.idle_timeout = idle_timeout
+        self._connections = {}
+        self.lock = threading.Lock()
+        self._reaper_thread = threading.Thread(target=self._close_idle_connections, daemon=True)
+        self._reaper_thread.start()
+
+    def _get(self, identifier, backend_name):
+        with self.lock:
+            conn = self._connections.get(identifier)
+            if conn is None or conn.backend_name != backend_name:
+                if conn is not None:
+                    with conn.lock:
+                        conn.close()
+                conn = PrinterConnection(identifier, backend_name)
+                self._connections[identifier] = conn
+            return conn
+
+    @contextmanager
+    def connection(self, printer_info, timeout=-1):
+        """
+        Hold exclusive use of a printer's connection for the duration of the block.
+
+        With a timeout (seconds), raises PrinterBusyError if another job keeps
+        the connection longer than that.
+        """
+        conn = self._get(printer_info["identifier"], printer_info["backend"])
+        if not conn.lock.acquire(timeout=timeout):
+            raise PrinterBusyError(f"Printer {conn.identifier} is busy")
+        try:
+            yield conn
+            conn.last_used = time.monotonic()
+        finally:
+            conn.lock.release()
+
+    def _write(self, conn, data):
+        """Write data, reconnecting once when the write fails with a (non-timeout) USB error."""
+        for attempt in (1, 2):
+            try:
+                conn.open().write(data)
+                return
+            except (usb.core.USBError, OSError) as e:
+                if _is_usb_timeout(e):
+                    raise
+                conn.close()
+                if attempt == 2:
+                    raise
+                logger.warning(f"Write to {conn.identifier} failed ({e}), reconnecting")
+
+    def _request_status(self, conn, timeout):
+        """Send a status request on an already held connection and decode the reply."""
+        # Discard replies left over from an earlier job so they are not taken for ours
+        for _ in range(16):
+            if not conn.read():
+                break
+        self._write(conn, STATUS_REQUEST)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data = conn.read()
+            if not data:
+                time.sleep(0.005)
+                continue
+            try:
+                return interpret_response(data)
+            except (ValueError, NameError):
+                logger.debug(f"Ignoring unexpected printer response: {data}")
+        raise TimeoutError(f"No status reply from {conn.identifier} within {timeout}s")
+
+    def query_status(self, printer_info, timeout=2, busy_timeout=0.5):
+        """
+        Query the printer's status over the pooled connection.
+
+        Returns brother_ql's decoded 32-byte status packet (phase_type,
+        media_width, media_length, media_type, errors, ...). Raises
+        PrinterBusyError if a job holds the connection for more than
+        busy_timeout seconds, TimeoutError if the printer does not answer.
+        """
+        with self.connection(printer_info, timeout=busy_timeout) as conn:
+            return self._request_status(conn, timeout)
+
+    def invalidate(self, identifier):
+        """Drop the handle for identifier so the next use reconnects."""
+        with self.lock:
+            conn = self._connections.get(identifier)
+        if conn is not None:
+            with conn.lock:
+                conn.close()
+
+    def send(self, instructions, printer_info, blocking=True, timeout=10, pages=1, on_progress=None,
+             check_status=True):
+        """
+        Send raster instructions over the pooled connection.
+
+        Mirrors brother_ql.backends.helpers.send but reuses the open handle and
+        reconnects once when the write fails with a (non-timeout) USB error.
+        For multi-page jobs on_progress(printed_pages) is called after each
+        page; timeout counts from the last page printed. With check_status the
+        printer is asked for its status first, and nothing is sent if it
+        reports an error (no media, cover open, ...).
+        """
+        status = {
+            "instructions_sent": False,
+            "outcome": "unknown",
+            "printer_state": None,
+            "did_print": False,
+            "ready_for_next_job": False,
+            "pages_printed": 0,
+        }
+        with self.connection(printer_info) as conn:
+            if check_status and conn.backend_name != "network":
+                try:
+                    result = self._request_status(conn, timeout=2)
+                except TimeoutError:
+                    # Older firmware may not answer while waking up; print anyway
+                    logger.warning(f"No status reply from {conn.identifier}, sending without pre-check")
+                else:
+                    status["printer_state"] = result
+                    if result["errors"]:
+                        logger.error(f"Printer {conn.identifier} not ready: {result['errors']}")
+                        status["outcome"] = "error"
+                        return status
+            self._write(conn, instructions)
+            status["instructions_sent"] = True
+            status["outcome"] = "sent"
+
+            if not blocking or conn.backend_name == "network":
+                return status
+
+            start = time.time()
+            while time.time() - start < timeout:
+                data = conn.read()
+                if not data:
+                    time.sleep(0.005)
+                    continue
+                try:
+                    result = interpret_response(data)
+                except (ValueError, NameError):
+                    logger.error(f"Couldn't understand printer response: {data}")
+                    continue
+                status["printer_state"] = result
+                if result["errors"]:
+                    logger.error(f"Errors occurred: {result['errors']}")
+                    status["outcome"] = "error"
+                    break
+                if result["status_type"] == "Printing completed":
+                    status["pages_printed"] += 1
+                    start = time.time()
+                    if on_progress:
+                        on_progress(status["pages_printed"])
+                    if status["pages_printed"] >= pages:
+                        status["did_print"] = True
+                        status["outcome"] = "printed"
+                if result["status_type"] == "Phase change" and result["phase_type"] == "Waiting to receive":
+                    status["ready_for_next_job"] = True
+                if status["did_print"] and status["ready_for_next_job"]:
+                    break
+
+        if not (status["did_print"] and status["ready_for_next_job"]):
+            logger.warning(f"Printing on {printer_info['identifier']} potentially not successful: {status['outcome']}")
+        return status
+
+    def close_all(self):
+        with self.lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn in connections:
+            with conn.lock:
+                conn.close()
+
+    def _close_idle_connections(self):
+        """Periodically close handles that have not been used for idle_timeout seconds"""
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            now = time.monotonic()
+            with self.lock:
+                connections = list(self._connections.values())
+            for conn in connections:
+                # Skip connections that are busy sending right now
+                if not conn.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if conn.handle is not None and now - conn.last_used > self.idle_timeout:
+                        logger.debug(f"Closing idle connection to {conn.identifier}")
+                        conn.close()
+                finally:
+                    conn.lock.release()
+
+
+# Global connection manager instance
+connection_manager = PrinterConnectionManager(idle_timeout=PRINTER_IDLE_TIMEOUT)
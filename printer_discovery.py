@@ -0,0 +1,91 @@
+"""Process-wide printer discovery shared by every browser session."""
+
+import logging
+import threading
+import time
+
+from config_manager import PRINTER_DISCOVERY_INTERVAL
+from printer_utils import find_and_parse_printer, STATUS_FIELDS
+
+logger = logging.getLogger("sticker_factory.printer_discovery")
+
+
+class PrinterDiscovery:
+    """
+    Background thread that scans for printers every refresh_interval seconds.
+
+    Sessions read the latest snapshot with get_printers() instead of scanning
+    on their own, so the USB bus is probed once per interval no matter how
+    many browser tabs are open. refresh() forces an immediate scan.
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._printers = []
+        self.last_refresh = 0
+        self._generation = 0  # bumped after every completed scan
+        self._cond = threading.Condition()
+        self._refresh_requested = threading.Event()
+        self._thread = threading.Thread(target=self._discover, daemon=True)
+        self._thread.start()
+
+    def get_printers(self, timeout=10):
+        """Return the latest printer list, waiting up to timeout seconds for the first scan."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._generation > 0, timeout=timeout)
+            return list(self._printers)
+
+    def refresh(self, wait=True, timeout=10):
+        """Request a scan now; with wait, block until it finishes and return the new list."""
+        with self._cond:
+            generation = self._generation
+            self._refresh_requested.set()
+            if wait:
+                self._cond.wait_for(lambda: self._generation > generation, timeout=timeout)
+            return list(self._printers)
+
+    def _scan(self):
+        new_printers = find_and_parse_printer()
+        with self._cond:
+            previous = {p['identifier']: p for p in self._printers}
+            for printer in new_printers:
+                last = previous.get(printer['identifier'])
+                if last is None:
+                    continue
+                # A printer busy with a job was not queried; its media has not changed
+                if printer['status'] == "busy":
+                    for field in STATUS_FIELDS:
+                        printer[field] = last[field]
+                # Still probing: show the last known media until the probe answers
+                elif printer['status'] == "probing" and printer['label_type'] == "unknown":
+                    for field in STATUS_FIELDS[1:]:
+                        printer[field] = last[field]
+            # Printers busy with a job may not show up; keep the last known list
+            # rather than dropping them from every session's sidebar
+            if new_printers or not self._printers:
+                self._printers = new_printers
+            else:
+                logger.warning("No printers found during refresh, keeping cached printers (they might be busy)")
+            self.last_refresh = time.time()
+            self._generation += 1
+            self._cond.notify_all()
+
+    def _discover(self):
+        """Discovery thread: scan on schedule or on demand"""
+        while True:
+            self._refresh_requested.clear()
+            logger.info("Refreshing printer list...")
+            try:
+                self._scan()
+            except Exception as e:
+                logger.error(f"Error discovering printers: {e}")
+                with self._cond:
+                    self._generation += 1
+                    self._cond.notify_all()
+            # Rescan sooner while nothing is attached
+            interval = self.refresh_interval if self._printers else min(self.refresh_interval, 5)
+            self._refresh_requested.wait(timeout=interval)
+
+
+# Global discovery instance
+printer_discovery = PrinterDiscovery(refresh_interval=PRINTER_DISCOVERY_INTERVAL)
@@ -1,30 +1,34 @@
 """Printer handling and detection utilities for the Sticker Factory."""
 
 import logging
-import subprocess
 import tempfile
-import time
+import threading
 import os
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from brother_ql.models import ModelsManager
 from brother_ql.backends import backend_factory
-from brother_ql import labels
+from brother_ql.labels import FormFactor
 from brother_ql.raster import BrotherQLRaster
 from brother_ql.conversion import convert
-from brother_ql.backends.helpers import send
+from brother_ql import BrotherQLUnsupportedCmd
 import usb.core
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from PIL import Image
 
 import streamlit as st
-from job_queue import print_queue
-from config_manager import PRIVACY_MODE
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from job_queue import print_queue, SessionLimitError
+from raster_cache import raster_cache, make_raster_key
+from printer_connection import connection_manager, PrinterBusyError
+from label_index import model_for_product_id, label_type_for_width, label_dots, get_label
+from dithering import DEFAULT_ALGORITHM, dither as dither_image
+from label_archive import label_archive
+from config_manager import PRIVACY_MODE, DEBUG_TEMP_FILES, PRINTER_PROBE_TIMEOUT, PRINTER_PROBE_WORKERS
 
 logger = logging.getLogger("sticker_factory.printer_utils")
 
-def safe_filename(text):
-    epoch_time = int(time.time())
-    return f"{epoch_time}_{text}.png"
-
 @dataclass
 class PrinterInfo:
     identifier: str
@@ -50,7 +54,6 @@ class PrinterInfo:
 
 def find_and_parse_printer():
     logger.info("Searching for Brother QL printers...")
-    model_manager = ModelsManager()
     
     found_printers = []
 
@@ -81,15 +84,14 @@ def find_and_parse_printer():
                     continue
                 
                 try:
-                    product_id_int = int(product_id, 16)
-                    for m in model_manager.iter_elements():
-                        if m.product_id == product_id_int:
-                            model = m.identifier
-                            break
-                    logger.debug(f"Matched printer model: {model}")
+                    model = model_for_product_id(product_id)
                 except ValueError:
                     logger.warning(f"Invalid product ID format: {product_id}")
                     continue
+                if model is None:
+                    logger.warning(f"Unknown Brother product ID {product_id}, skipping {identifier}")
+                    continue
+                logger.debug(f"Matched printer model: {model}")
 
                 printer_info = PrinterInfo(
                     identifier=identifier,
@@ -103,114 +105,207 @@ def find_and_parse_printer():
 
                 found_printers.append(printer_info)   
                 printer_info['name'] = f"{printer_info['model']} - {printer_info['serial_number'][-4:]}"
-                get_printer_status(printer_info)
                 logger.debug(f"Added printer: {printer_info}")
 
         except Exception as e:
             logger.error(f"Error with backend {backend_name}: {str(e)}")
             continue    
+
+    probe_printers(found_printers)
     return found_printers
 
 
+# Fields filled in by get_printer_status
+STATUS_FIELDS = ("status", "label_type", "label_size", "label_width", "label_height")
+
+_probe_pool = ThreadPoolExecutor(max_workers=PRINTER_PROBE_WORKERS, thread_name_prefix="printer-probe")
+_probe_lock = threading.RLock()
+_probes = {}  # identifier -> status probe still running
+_probe_targets = {}  # identifier -> latest PrinterInfo that should receive the result
+
+
+def _probe(printer):
+    """Run get_printer_status on a scratch copy, so a late result never half-updates a printer."""
+    probe = replace(printer)
+    get_printer_status(probe)
+    return probe
+
+
+def _apply_probe(identifier, future):
+    with _probe_lock:
+        if _probes.get(identifier) is future:
+            del _probes[identifier]
+        target = _probe_targets.get(identifier)
+        if target is None or future.exception() is not None:
+            return
+        for field in STATUS_FIELDS:
+            target[field] = future.result()[field]
+
+
+def probe_printers(printers, deadline=None):
+    """
+    Query the status of all printers concurrently.
+
+    Waits at most deadline seconds overall. Printers that have not answered
+    by then keep status "probing"; their probe keeps running in the pool and
+    fills in the printer when it finishes. A printer is never probed twice
+    at the same time.
+    """
+    deadline = PRINTER_PROBE_TIMEOUT if deadline is None else deadline
+    futures = []
+    with _probe_lock:
+        for printer in printers:
+            identifier = printer['identifier']
+            printer['status'] = "probing"
+            _probe_targets[identifier] = printer
+            future = _probes.get(identifier)
+            if future is None:
+                future = _probe_pool.submit(_probe, printer)
+                _probes[identifier] = future
+                future.add_done_callback(partial(_apply_probe, identifier))
+            futures.append((identifier, future))
+
+    done, _ = wait([future for _, future in futures], timeout=deadline)
+    for identifier, future in futures:
+        if future in done:
+            # Callbacks may still be pending when wait() returns
+            _apply_probe(identifier, future)
+        else:
+            logger.warning(f"Printer {identifier} did not answer within {deadline}s, still probing")
+
+
 def get_printer_status(printer):
+    """Query the printer over its pooled connection and fill in status and loaded media."""
     printer['status'] = "unknown"
     printer['label_type'] = "unknown"
     printer['label_size'] = "unknown"
     printer['label_width'] = 0
     printer['label_height'] = 0
     try:
-        cmd = f"brother_ql -b pyusb --model {printer['model']} -p {printer['identifier']} status"
-        logger.debug(f"Running status command: {cmd}")
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=5)
-        
-        # Log the raw output for debugging
-        if result.stdout:
-            logger.debug(f"Status command stdout:\n{result.stdout}")
-        if result.stderr:
-            logger.warning(f"Status command stderr:\n{result.stderr}")
-        if result.returncode != 0:
-            logger.warning(f"Status command returned non-zero exit code: {result.returncode}")
-            
-        for line in result.stdout.splitlines():
-            if "Phase:" in line:
-                printer['status'] = line.split("Phase:")[1].strip()
-                logger.debug(f"Detected status: {printer['status']}")
-            if "Media size:" in line:
-                printer['label_size'] = line.split("Media size:")[1].strip()
-                size_str = line.split("Media size:")[1].strip().split('x')[0].strip()
-                try:
-                    media_width_mm = int(size_str)
-                    label_sizes = {
-                        12: "12", 29: "29", 38: "38", 50: "50", 54: "54",
-                        62: "62", 102: "102", 103: "103", 104: "104"
-                    }
-                    if media_width_mm in label_sizes:
-                        label_type = label_sizes[media_width_mm]
-                        printer['label_type'] = label_type
-                        printer['label_width'] = get_label_width(label_type)
-                        printer['label_height'] = None
-                        logger.debug(f"Detected label type: {label_type} from width: {media_width_mm}mm")
-                except Exception as e:
-                    logger.warning(f"Exception parsing media width: {str(e)}")
+        result = connection_manager.query_status(printer)
+        logger.debug(f"Status reply from {printer['identifier']}: {result}")
+
+        printer['status'] = result['phase_type']
+        if result['errors']:
+            printer['status'] = ", ".join(result['errors'])
+        printer['label_size'] = f"{result['media_width']} x {result['media_length']} mm"
+        media_width_mm = result['media_width']
+        label_type = label_type_for_width(media_width_mm, printer['model'])
+        if label_type is not None:
+            printer['label_type'] = label_type
+            printer['label_width'] = get_label_width(label_type)
+            printer['label_height'] = None
+            logger.debug(f"Detected label type: {label_type} from width: {media_width_mm}mm")
         logger.info(f"Printer {printer['name']}: label type: {printer['label_type']}, status: {printer['status']}")
 
-    except subprocess.TimeoutExpired:
+    except PrinterBusyError:
+        logger.info(f"Printer {printer['name']} is busy printing, status not refreshed")
+        printer['status'] = "busy"
+    except TimeoutError:
         logger.error(f"Timeout getting status for printer {printer['name']} - USB might be busy")
         printer['status'] = "timeout"
     except Exception as e:
         logger.warning(f"Error getting status for printer {printer['name']}: {str(e)}")
+        # Drop the handle so the next query reconnects to the device
+        connection_manager.invalidate(printer['identifier'])
         printer['status'] = str(e)
 
 
 def get_label_width(label_type):
     """Get the pixel width of a label type."""
-    label_definitions = labels.ALL_LABELS
-    for label in label_definitions:
-        if label.identifier == label_type:
-            width = label.dots_printable[0]
-            logger.debug(f"Label type {label_type} width: {width} dots")
-            return width
-    raise ValueError(f"Label type {label_type} not found in label definitions")
+    return label_dots(label_type)[0]
 
 
-def print_image(image, printer_info, rotate=0, dither=False):
-    """Queue a print job."""
-    temp_dir = tempfile.gettempdir()
-    os.makedirs(temp_dir, exist_ok=True)
+def get_session_id():
+    """Return the Streamlit session id of the current script run, if any."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
 
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False, dir=temp_dir) as temp_file:
-        temp_file_path = temp_file.name
-        image.save(temp_file_path, "PNG")
-        logger.info(f"Image saved to: {temp_file_path}")
+
+def save_label(image):
+    """Archive a printed label (or each image of a batch) and return the filename(s)."""
+    if isinstance(image, Sequence):
+        return ", ".join(save_label(page) for page in image)
+    return label_archive.store(image, name="Stikka")
+
+
+def _save_label_when_done(job):
+    """Done callback for non-blocking jobs; runs on the print worker thread."""
+    if job.status == "completed" and not PRIVACY_MODE:
+        try:
+            logger.info(f"Sticker saved as {save_label(job.image)}")
+        except Exception as e:
+            logger.error(f"Error saving label of job {job.id}: {e}")
+
+
+def print_image(image, printer_info, rotate=0, dither=False, priority=0, wait=True, copies=1, cut_each=True,
+                dither_algorithm=None):
+    """
+    Queue a print job.
+
+    dither_algorithm selects one of dithering.ALGORITHMS when dither is set.
+
+    image may be a sequence of images (a list or a lazy pdf_pages.PdfPages)
+    to print as one batch; copies repeats the whole batch, and
+    cut_each=False cuts only after the last label. The batch is converted
+    once and sent in a single USB session.
+
+    With wait=True (default) this blocks until the job finishes and returns
+    True/False. With wait=False it returns the job id immediately; progress
+    shows in the sidebar queue view and the label is archived when it prints.
+    """
+    is_batch = isinstance(image, Sequence)
+    temp_file_path = None
+    if DEBUG_TEMP_FILES and not is_batch:
+        # Debug mode: keep a PNG of every job on disk and convert from the file
+        temp_dir = tempfile.gettempdir()
+        os.makedirs(temp_dir, exist_ok=True)
+
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False, dir=temp_dir) as temp_file:
+            temp_file_path = temp_file.name
+            image.save(temp_file_path, "PNG")
+            logger.info(f"Image saved to: {temp_file_path}")
 
     logger.info(f"Using label type: {printer_info['label_type']}")
 
-    job_id = print_queue.add_job(
-        image,
-        rotate=rotate,
-        dither=dither,
-        printer_info=printer_info,
-        temp_file_path=temp_file_path,
-        label_type=printer_info["label_type"]
-    )
+    try:
+        job_id = print_queue.add_job(
+            image,
+            priority=priority,
+            session_id=get_session_id(),
+            rotate=rotate,
+            dither=dither,
+            dither_algorithm=dither_algorithm,
+            printer_info=printer_info,
+            temp_file_path=temp_file_path,
+            label_type=printer_info["label_type"],
+            copies=copies,
+            cut_each=cut_each,
+        )
+    except SessionLimitError as e:
+        st.warning(str(e))
+        return False if wait else None
+
+    if not wait:
+        print_queue.add_done_callback(job_id, _save_label_when_done)
+        return job_id
 
-    status = print_queue.get_job_status(job_id)
     status_container = st.empty()
-    
-    while status.status in ["pending", "processing"]:
-        status_container.info(f"Print job status: {status.status}")
-        time.sleep(0.5)
-        status = print_queue.get_job_status(job_id)
+    status = print_queue.get_job_status(job_id)
+    # Wakes as soon as the job finishes; the timeout only refreshes the status text
+    while not print_queue.wait_for_job(job_id, timeout=0.5):
+        progress = f" ({status.progress['printed']}/{status.progress['total']} labels)" if status.progress["total"] > 1 else ""
+        status_container.info(f"Print job status: {status.status}{progress}")
 
     if status.status == "completed":
         status_container.success("Print job completed successfully!")
         if PRIVACY_MODE:
             # Clear the image from memory or perform any privacy-related actions
-            image.close()
+            # Pages of a lazy batch were rendered and dropped one at a time
+            for page in (image if isinstance(image, (list, tuple)) else [] if is_batch else [image]):
+                page.close()
         else:
-            filename = safe_filename("Stikka-")
-            file_path = os.path.join("labels", filename)
-            image.save(file_path, "PNG")
+            filename = save_label(image)
             status_container.success(f"Sticker saved as {filename}")
 
 
@@ -220,58 +315,170 @@ def print_image(image, printer_info, rotate=0, dither=False):
         return False
 
 
-def process_print_job(image, printer_info, temp_file_path, rotate=0, dither=False, label_type="102", debug=False):
+def debug_enabled():
+    """Return the debug flag from secrets."""
+    return bool('debug' in st.secrets and st.secrets['debug'])
+
+
+class BatchRaster(BrotherQLRaster):
+    """BrotherQLRaster that lets the cutter fire every cut_every labels instead of after each one."""
+
+    cut_every = 1
+
+    def add_cut_every(self, n=1):
+        super().add_cut_every(self.cut_every)
+
+
+def raster_header(model):
+    """Return the instructions convert emits before the first page for a model."""
+    qlr = BrotherQLRaster(model)
+    try:
+        qlr.add_switch_mode()
+    except BrotherQLUnsupportedCmd:
+        pass
+    qlr.add_invalidate()
+    qlr.add_initialize()
+    try:
+        qlr.add_switch_mode()
+    except BrotherQLUnsupportedCmd:
+        pass
+    return bytes(qlr.data)
+
+
+def repeat_pages(instructions, model, copies):
     """
-    Process a single print job.
-    Returns (success, error_message)
+    Repeat every page of a converted job copies times in one raster stream.
+
+    convert output is header + pages separated by a form feed (0x0C) and
+    terminated by 0x1A; the page block is reused verbatim, so copies cost
+    no extra conversion.
     """
-    # Get debug flag from secrets if not explicitly passed
-    if not debug and 'debug' in st.secrets:
-        debug = st.secrets['debug']
+    if copies <= 1:
+        return instructions
+    header = raster_header(model)
+    pages = instructions[len(header):-1]
+    return header + (pages + b"\x0c") * (copies - 1) + pages + b"\x1a"
 
-    try:
+
+def dither_for_label(image, label_type, rotate=0, algorithm=DEFAULT_ALGORITHM):
+    """Rotate and scale image the way convert would for label_type, then dither it to 1-bit."""
+    label = get_label(label_type)
+    if rotate:
+        image = image.rotate(rotate, expand=True)
+    width = label.dots_printable[0]
+    if label.form_factor in (FormFactor.ENDLESS, FormFactor.PTOUCH_ENDLESS) and image.width != width:
+        image = image.resize((width, int(width / image.width * image.height)), Image.LANCZOS)
+    return dither_image(image, algorithm)
+
+
+class DitheredLabels(Sequence):
+    """Batch pages dithered for the label one at a time, as convert reaches them."""
+
+    def __init__(self, images, label_type, rotate, algorithm):
+        self.images = images
+        self.label_type = label_type
+        self.rotate = rotate
+        self.algorithm = algorithm
+
+    def __len__(self):
+        return len(self.images)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DitheredLabels(self.images[index], self.label_type, self.rotate, self.algorithm)
+        return dither_for_label(self.images[index], self.label_type, self.rotate, self.algorithm)
+
+    def __iter__(self):
+        # Iterate the source so a PdfPages renders in one pass
+        for image in self.images:
+            yield dither_for_label(image, self.label_type, self.rotate, self.algorithm)
+
+
+def rasterize_print_job(image, printer_info, temp_file_path=None, rotate=0, dither=False, label_type="102",
+                        threshold=70, cut=True, debug=False, copies=1, cut_each=True, dither_algorithm=None):
+    """
+    Convert a job to brother_ql raster instructions.
+
+    image is a PIL image (any mode, including pre-converted 1-bit) or a
+    sequence of them for a batch (a list, or a PdfPages that renders each
+    page as convert reaches it); images are handed to convert directly and
+    temp_file_path is only set in debug mode. A batch is converted once and
+    repeated copies times, cutting after each label or only at the end.
+    Reprints of the same label are served from the raster cache.
+
+    With dither, dither_algorithm picks one of dithering.ALGORITHMS; the
+    default (None or Floyd-Steinberg) leaves dithering to brother_ql.
+    """
+    images = image if isinstance(image, Sequence) else [image]
+    total_labels = len(images) * copies
+
+    # Debug log before conversion
+    if debug:
+        logger.debug(f"Starting print job with label_type: {label_type}, {total_labels} label(s)")
+
+    # The cut-every counter is a single byte
+    cut_every = 1 if cut_each else min(total_labels, 255)
+
+    # Reprints of the same label skip conversion entirely
+    if not dither or dither_algorithm == DEFAULT_ALGORITHM:
+        dither_algorithm = None
+    cache_key = make_raster_key(images, printer_info["model"], label_type, rotate, dither, threshold, cut,
+                                cut_every=cut_every, dither_algorithm=dither_algorithm)
+    instructions = raster_cache.get(cache_key)
+    if instructions is None:
+        if dither_algorithm:
+            # Dither here at the printed size; convert then only thresholds the 1-bit result
+            images = DitheredLabels(images, label_type, rotate, dither_algorithm)
+            temp_file_path = None
         # Prepare the image for printing
-        qlr = BrotherQLRaster(printer_info["model"])
-        
-        # Debug log before conversion
-        if debug:
-            logger.debug(f"Starting print job with label_type: {label_type}")
-        
+        qlr = BatchRaster(printer_info["model"])
+        qlr.cut_every = cut_every
         instructions = convert(
             qlr=qlr,
-            images=[temp_file_path],
+            images=[temp_file_path] if temp_file_path else images,
             label=label_type,
-            rotate=rotate,
-            threshold=70,
-            dither=dither,
+            rotate=0 if dither_algorithm else rotate,
+            threshold=threshold,
+            dither=dither and not dither_algorithm,
             compress=True,
             red=False,
             dpi_600=False,
             hq=False,
-            cut=True,
+            cut=cut,
         )
+        raster_cache.put(cache_key, instructions)
+    elif debug:
+        logger.debug(f"Raster cache hit for job on {printer_info['identifier']}")
+
+    # Debug logging
+    if debug:
+        logger.debug(f"""
+        Print parameters:
+        - Label type: {label_type}
+        - Rotate: {rotate}
+        - Dither: {dither} ({dither_algorithm or DEFAULT_ALGORITHM})
+        - Copies: {copies}
+        - Cut after each label: {cut_each}
+        - Model: {printer_info['model']}
+        - Backend: {printer_info['backend']}
+        - Identifier: {printer_info['identifier']}
+        """)
+    return repeat_pages(instructions, printer_info["model"], copies)
+
+
+def send_print_job(instructions, printer_info, debug=False, pages=1, on_progress=None):
+    """
+    Send raster instructions to the printer.
+    on_progress(printed_pages) is called as each of the job's pages prints.
+    Returns (success, error_message)
+    """
+    try:
+        # Send over the pooled connection, using the backend discovery found
+        result = connection_manager.send(instructions, printer_info, pages=pages, on_progress=on_progress)
 
-        # Debug logging
-        if debug:
-            logger.debug(f"""
-            Print parameters:
-            - Label type: {label_type}
-            - Rotate: {rotate}
-            - Dither: {dither}
-            - Model: {printer_info['model']}
-            - Backend: {printer_info['backend']}
-            - Identifier: {printer_info['identifier']}
-            """)
-
-        # Try to print using Python API
-        success = send(
-            instructions=instructions,
-            printer_identifier=printer_info["identifier"],
-            backend_identifier="pyusb"
-        )
-        
-        if not success:
-            return False, "Failed to print using Python API"
+        if result["outcome"] == "error":
+            errors = result["printer_state"]["errors"] if result["printer_state"] else []
+            return False, f"Printer reported errors: {', '.join(errors)}"
 
         return True, None
 
@@ -281,6 +488,8 @@ def process_print_job(image, printer_info, temp_file_path, rotate=0, dither=Fals
             if debug:
                 logger.debug("USB timeout occurred - this is normal and the print likely completed")
             return True, "Print completed (timeout is normal)"
+        # Drop the handle so the next job reconnects to the device
+        connection_manager.invalidate(printer_info["identifier"])
         error_msg = f"USBError encountered: {e}"
         if debug:
             logger.debug(error_msg)
@@ -291,3 +500,27 @@ def process_print_job(image, printer_info, temp_file_path, rotate=0, dither=Fals
         if debug:
             logger.debug(error_msg)
         return False, error_msg
+
+
+def process_print_job(image, printer_info, temp_file_path=None, rotate=0, dither=False, label_type="102", debug=False,
+                      threshold=70, cut=True):
+    """
+    Process a single print job: rasterize, then send.
+    Returns (success, error_message)
+    """
+    # Get debug flag from secrets if not explicitly passed
+    debug = debug or debug_enabled()
+
+    try:
+        instructions = rasterize_print_job(
+            image, printer_info, temp_file_path,
+            rotate=rotate, dither=dither, label_type=label_type,
+            threshold=threshold, cut=cut, debug=debug,
+        )
+    except Exception as e:
+        error_msg = f"Unexpected error during printing: {str(e)}"
+        if debug:
+            logger.debug(error_msg)
+        return False, error_msg
+
+    return send_print_job(instructions, printer_info, debug=debug)
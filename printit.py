@@ -1,10 +1,9 @@
 import streamlit as st
-import glob
 import os
 import re
-import time
 import hashlib
 import logging
+from datetime import datetime
 from pathlib import Path
 from brother_ql import labels
 
@@ -16,7 +15,7 @@ logger = logging.getLogger("sticker_factory.printit")
 from config_manager import (
     APP_TITLE,
     PRIVACY_MODE,
-    HISTORY_LIMIT,
+    QUEUE_VIEW,
     TABS_CONFIG,
 )
 
@@ -26,17 +25,25 @@ from config_manager import (
 # Import image utilities
 from image_utils import (
     preper_image,
-    apply_threshold,
+    prepare_image,
+    prepared_image_cache,
     resize_image_to_width,
     add_border,
-    apply_histogram_equalization,
     img_concat_v,
 )
 from printer_utils import (
-    find_and_parse_printer,
     print_image,
+    get_session_id,
+    debug_enabled,
     # get_label_type
 )
+from job_queue import print_queue
+from raster_cache import raster_cache
+from preview import preview_cache
+from app_cache import cache_stats
+from font_catalog import font_catalog
+from history_index import history_index
+from printer_discovery import printer_discovery
 
 def get_enabled_tabs():
     """Return list of enabled tab names from config, excluding History if privacy_mode is true."""
@@ -63,83 +70,9 @@ def get_enabled_tabs():
     return enabled
 
 
-def list_saved_images(filter_duplicates=True):
-    temp_files = glob.glob(os.path.join("temp", "*.[pj][np][g]*"))
-    label_files = glob.glob(os.path.join("labels", "*.[pj][np][g]*"))
-    image_files = temp_files + label_files
-
-    valid_images = [
-        f for f in image_files 
-        if "write_something" not in os.path.basename(f).lower()
-    ]
-
-    if not filter_duplicates:
-        return sorted(valid_images, key=os.path.getmtime, reverse=True)[:HISTORY_LIMIT]
-
-    unique_images = {}
-    for image_path in valid_images:
-        try:
-            file_size = os.path.getsize(image_path)
-            
-            if file_size in unique_images:
-                existing_time = os.path.getmtime(unique_images[file_size])
-                current_time = os.path.getmtime(image_path)
-                if current_time > existing_time:
-                    unique_images[file_size] = image_path
-            else:
-                unique_images[file_size] = image_path
-        except Exception as e:
-            logger.error(f"Error processing {image_path}: {e}")
-            continue
-
-    return sorted(unique_images.values(), key=os.path.getmtime, reverse=True)[:HISTORY_LIMIT]
-
 def get_fonts():
     """Return list of fonts with 5x5-Tami.ttf as default, followed by system fonts (TTF and OTF)"""
-    fonts = []
-    
-    default_font = "fonts/5x5-Tami.ttf"
-    if os.path.exists(default_font):
-        fonts.append(default_font)
-    
-    try:
-        for font_file in os.listdir("fonts/"):
-            if (font_file.endswith(".ttf") or font_file.endswith(".otf")) and font_file != "5x5-Tami.ttf":
-                fonts.append("fonts/" + font_file)
-    except OSError:
-        pass
-    
-    import platform
-    system = platform.system()
-    
-    system_font_dirs = []
-    if system == "Windows":
-        system_font_dirs = ["C:/Windows/Fonts/", "C:/Windows/System32/Fonts/"]
-    elif system == "Darwin":
-        system_font_dirs = ["/System/Library/Fonts/", "/Library/Fonts/", f"/Users/{os.environ.get('USER', '')}/Library/Fonts/"]
-    elif system == "Linux":
-        system_font_dirs = ["/usr/share/fonts/", "/usr/local/share/fonts/", f"/home/{os.environ.get('USER', '')}/.fonts/", f"/home/{os.environ.get('USER', '')}/.local/share/fonts/"]
-    
-    for font_dir in system_font_dirs:
-        if os.path.exists(font_dir):
-            try:
-                for root, dirs, files in os.walk(font_dir):
-                    for file in files:
-                        if file.lower().endswith('.ttf'):
-                            full_path = os.path.join(root, file)
-                            if full_path not in fonts:
-                                fonts.append(full_path)
-            except (OSError, PermissionError):
-                continue
-    
-    seen = set()
-    unique_fonts = []
-    for font in fonts:
-        if font not in seen:
-            seen.add(font)
-            unique_fonts.append(font)
-    
-    return unique_fonts if unique_fonts else ["fonts/5x5-Tami.ttf"]
+    return font_catalog.fonts()
 
 label_dir = "labels"
 os.makedirs(label_dir, exist_ok=True)
@@ -173,35 +106,51 @@ st.subheader(":primary[:printer: hard copies of images and text]")
 # ============================================================================
 
 def get_cached_printers():
-    """Get printers, caching them in session state to avoid re-querying while busy."""
-    # Initialize session state for printers if not exists
-    if "cached_printers" not in st.session_state:
-        st.session_state.cached_printers = []
-        st.session_state.last_printer_check = 0
-
-    current_time = time.time()
-    # Re-check every 30 seconds, or if we have no printers
-    if current_time - st.session_state.last_printer_check > 30 or not st.session_state.cached_printers:
-        logger.info("Refreshing printer list...")
-        new_printers = find_and_parse_printer()
-        
-        # If we found printers, update the cache
-        # If we found NO printers but we HAD some, maybe they are just busy?
-        # We only overwrite if we actually found something, or if it's been a long time
-        if new_printers:
-            st.session_state.cached_printers = new_printers
-            st.session_state.last_printer_check = current_time
-        elif not st.session_state.cached_printers:
-            # Truly no printers found and none cached
-            st.session_state.cached_printers = []
-            st.session_state.last_printer_check = current_time
-        else:
-            logger.warning("No printers found during refresh, keeping cached printers (they might be busy)")
-            
-    return st.session_state.cached_printers
+    """Get printers from the process-wide discovery service instead of scanning per session."""
+    return printer_discovery.get_printers()
+
+@st.fragment(run_every=2)
+def render_queue_view(printers):
+    """Show this session's jobs with their place in line and estimated wait, refreshing on its own."""
+    queue_status = print_queue.get_queue_status()
+    session_id = get_session_id()
+    printer_names = {p['identifier']: p['name'] for p in printers}
+
+    st.subheader(":primary[Print Queue]")
+    st.caption(f"{queue_status['queue_size']} job(s) waiting")
+    for job in queue_status["jobs"].values():
+        if job["session_id"] != session_id:
+            continue
+        printer_name = printer_names.get(job["printer"], job["printer"])
+        if job["status"] == "completed":
+            if (datetime.now() - job["completed_at"]).total_seconds() < 60:
+                st.markdown(f"- :green[printed] on {printer_name}")
+        elif job["status"] == "failed":
+            st.markdown(f"- :red[failed] on {printer_name}: {job['error']}")
+        elif job["position"] == 1:
+            progress = job["progress"]
+            if progress["total"] > 1:
+                st.markdown(f"- :green[printing {progress['printed']}/{progress['total']}] on {printer_name}")
+            else:
+                st.markdown(f"- :green[printing now] on {printer_name}")
+        elif job["position"]:
+            st.markdown(f"- #{job['position']} on {printer_name}, ~{int(job['estimated_wait'])}s")
+
+def render_cache_stats():
+    """Debug panel with hit rates of the process-wide caches."""
+    rows = {name: stats for name, stats in cache_stats.snapshot().items()}
+    rows["raster"] = raster_cache.stats()
+    rows["prepared"] = prepared_image_cache.stats()
+    rows["preview"] = preview_cache.stats()
+    with st.expander("Cache stats"):
+        for name, stats in rows.items():
+            lookups = stats["hits"] + stats["misses"]
+            st.markdown(f"- **{name}**: {stats['hit_rate']:.0%} of {lookups} ({stats['misses']} miss)")
 
 st.sidebar.title(":primary[Settings]")
 
+if st.sidebar.button("Refresh printers", icon=":material/refresh:"):
+    printer_discovery.refresh()
 printers = get_cached_printers()
 
 # check printer statuses 
@@ -230,7 +179,7 @@ if not selected_printer:
     
     st.sidebar.subheader("Detected Printers")
     for p in printers:
-        status_color = "green" if p['status'] == 'Waiting to receive' else "red"
+        status_color = "green" if p['status'] == 'Waiting to receive' else "orange" if p['status'] == "probing" else "red"
         label_color = "green" if p['label_type'] != 'unknown' else "red"
         st.sidebar.markdown(f":primary[**{p['name']}**]\n- Label Size: :{label_color}[{p['label_size']}]\n- Status:  :{status_color}[{p['status']}]")
     #st.stop()   
@@ -242,7 +191,7 @@ else:
 
     st.sidebar.subheader(":primary[Detected Printers]")
     for p in printers: 
-        status_color = "green" if p['status'] == 'Waiting to receive' else "red"
+        status_color = "green" if p['status'] == 'Waiting to receive' else "orange" if p['status'] == "probing" else "red"
         label_color = "green" if p['label_type'] != 'unknown' else "red"
         if p.name == selected_printer['name']:
             st.sidebar.markdown(f":green[**{p['name']}**]\n- Label Size: :{label_color}[{p['label_size']}]\n- Status:  :{status_color}[{p['status']}]")
@@ -251,6 +200,14 @@ else:
 
 
 
+    if QUEUE_VIEW:
+        with st.sidebar:
+            render_queue_view(printers)
+
+    if debug_enabled():
+        with st.sidebar:
+            render_cache_stats()
+
     # Get enabled tabs from configuration
     enabled_tab_names = get_enabled_tabs()
     logger.debug(f"Enabled tabs: {enabled_tab_names}")
@@ -270,7 +227,7 @@ else:
                     import tabs.sticker as sticker_module
                     sticker_module.render(
                         printer_info=selected_printer,
-                        preper_image=preper_image,
+                        prepare_image=prepare_image,
                         print_image=print_image,
                     )
                 elif tab_name == "Label":
@@ -299,7 +256,7 @@ else:
                     text2image_module.render(
                         submit_func=submit,
                         generate_image_func=text2image_module.generate_image,
-                        preper_image=preper_image,
+                        prepare_image=prepare_image,
                         print_image=print_image,
                         printer_info=selected_printer,
                     )
@@ -307,21 +264,19 @@ else:
                     import tabs.webcam as webcam_module
                     webcam_module.render(
                         printer_info=selected_printer,
-                        preper_image=preper_image,
+                        prepare_image=prepare_image,
                         print_image=print_image,
                     )
                 elif tab_name == "Cat":
                     import tabs.cat as cat_module
                     cat_module.render(
                         printer_info=selected_printer,
-                        preper_image=preper_image,
                         print_image=print_image,
                     )
                 elif tab_name == "Dog":
                     import tabs.dog as dog_module
                     dog_module.render(
                         printer_info=selected_printer,
-                        preper_image=preper_image,
                         print_image=print_image,
                     )
 
@@ -329,19 +284,18 @@ else:
                     import tabs.sticker_pro as sticker_pro_module    
                     sticker_pro_module.render(
                         print_image=print_image,
-                        apply_threshold=apply_threshold,
                         add_border=add_border,
-                        apply_histogram_equalization=apply_histogram_equalization,
                         resize_image_to_width=resize_image_to_width,
-                        preper_image=preper_image,
+                        prepare_image=prepare_image,
                         printer_info=selected_printer,
                     )
                 elif tab_name == "History":
                     import tabs.history as history_module
                     history_module.render(
-                        list_saved_images=list_saved_images,
+                        history_index=history_index,
                         print_image=print_image,
-                        preper_image=preper_image,
+                        prepare_image=prepare_image,
+                        printer_info=selected_printer,
                     )
                 elif tab_name == "FAQ":
                     import tabs.faq as faq_module
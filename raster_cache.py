@@ -0,0 +1,26 @@
+"""Content-addressed cache of brother_ql raster instructions."""
+
+import hashlib
+from collections.abc import Sequence
+
+from bytes_lru import BytesLRU
+from config_manager import RASTER_CACHE_MAX_ENTRIES, RASTER_CACHE_MAX_MB
+from image_utils import image_digest
+
+
+def make_raster_key(images, model, label_type, rotate=0, dither=False, threshold=70, cut=True, cut_every=1,
+                    dither_algorithm=None):
+    """Build a cache key from the image pixels and every parameter that affects conversion."""
+    if not isinstance(images, Sequence):
+        images = [images]
+    # Lazy page sequences identify their content without rendering it
+    digests = getattr(images, "digest", None) or ",".join(image_digest(image) for image in images)
+    params = f"{model}|{label_type}|{rotate}|{int(bool(dither))}|{dither_algorithm}|{threshold}|{int(bool(cut))}|{cut_every}"
+    return hashlib.sha256(f"{digests}|{params}".encode()).hexdigest()
+
+
+# Global raster cache instance
+raster_cache = BytesLRU(
+    max_entries=RASTER_CACHE_MAX_ENTRIES,
+    max_bytes=RASTER_CACHE_MAX_MB * 1024 * 1024,
+)
@@ -2,15 +2,14 @@
 
 import logging
 import streamlit as st
-import requests
-from io import BytesIO
-from PIL import Image
-import os
+
+from animal_prefetch import cat_prefetcher
+from preview import preview
 
 logger = logging.getLogger("sticker_factory.tabs.cat")
 
 
-def render(preper_image,printer_info, print_image):
+def render(printer_info, print_image):
     """Render the Cat tab."""
     st.subheader(":printer: a cat")
     st.caption("from the fine folks at https://thecatapi.com/")
@@ -27,26 +26,16 @@ def render(preper_image,printer_info, print_image):
     #     st.warning("⚠️ Cat API key is not configured")
     #     st.info("Add your cat_api_key to .streamlit/secrets.toml")
     if True:
+        # Have pictures ready for this printer before anyone asks
+        cat_prefetcher.prefetch(printer_info['label_width'])
         if st.button("Fetch cat"):
             try:
-                # Get cat image URL
-                response = requests.get(
-                    "https://api.thecatapi.com/v1/images/search",
-                    # headers={
-                    #     "x-api-key": cat_api_key
-                    #     }
-                )
-                response.raise_for_status()
-                image_url = response.json()[0]["url"]
-                
-                print(f"Fetched cat image URL: {image_url}")
-                # Download and process image
-                img = Image.open(BytesIO(requests.get(image_url).content)).convert('RGB')
-                grayscale_image, dithered_image = preper_image(img, label_width=printer_info['label_width'])
+                # Usually served from the prefetch buffer: already downloaded and dithered
+                grayscale, dithered = cat_prefetcher.take(printer_info['label_width'])
                 
                 # Store in session state
-                st.session_state.cat_image = grayscale_image
-                st.session_state.cat_dithered = dithered_image
+                st.session_state.cat_image = grayscale
+                st.session_state.cat_dithered = dithered
                 
             except Exception as e:
                 logger.error(f"Error fetching cat: {str(e)}")
@@ -54,7 +43,7 @@ def render(preper_image,printer_info, print_image):
             
         # Show image and print button if we have a cat
         if st.session_state.cat_dithered is not None:
-            st.image(st.session_state.cat_dithered, caption="Cat!")
+            st.image(preview(st.session_state.cat_dithered), caption="Cat!")
             if st.button("Print Cat", key="print_cat"):
-                print_image(st.session_state.cat_image, printer_info, dither=True)
-                st.success("Cat sent to printer!")
+                if print_image(st.session_state.cat_image, printer_info, dither=True, wait=False):
+                    st.success("Cat sent to printer!")
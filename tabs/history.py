@@ -5,14 +5,18 @@ import os
 from PIL import Image
 from datetime import datetime
 
+from config_manager import HISTORY_LIMIT
 
-def render(list_saved_images, print_image, preper_image):
+
+def render(history_index, print_image, prepare_image, printer_info):
     """Render the History tab."""
     st.subheader("Gallery of Labels and Stickers")
     
     # Initialize session state variables if they don't exist
-    if 'saved_images_list' not in st.session_state:
-        st.session_state.saved_images_list = list_saved_images()
+    if 'history_synced' not in st.session_state:
+        # Pick up files saved while the app was not running; later saves are indexed as they happen
+        history_index.sync()
+        st.session_state.history_synced = True
     if 'page_number' not in st.session_state:
         st.session_state.page_number = 0
     if 'search_query' not in st.session_state:
@@ -29,27 +33,23 @@ def render(list_saved_images, print_image, preper_image):
         search_query = st.text_input("Search filenames", value=st.session_state.search_query, key="history_search")
     with col2:
         filter_duplicates = st.checkbox("Filter duplicates", value=st.session_state.filter_duplicates, key="history_filter")
-        st.session_state.filter_duplicates = filter_duplicates
     with col3:
         if st.button("Refresh Gallery", key="history_refresh"):
-            st.session_state.saved_images_list = list_saved_images(filter_duplicates)
+            history_index.sync()
             st.session_state.page_number = 0
             st.rerun()
     
-    # Update image list if filter setting changed
-    if filter_duplicates != st.session_state.filter_duplicates:
-        st.session_state.saved_images_list = list_saved_images(filter_duplicates)
+    # Back to the first page when the filter or search changes
+    if filter_duplicates != st.session_state.filter_duplicates or search_query != st.session_state.get("history_last_search", ""):
+        st.session_state.filter_duplicates = filter_duplicates
+        st.session_state.history_last_search = search_query
         st.session_state.page_number = 0
-        st.rerun()
     
-    # Filter images based on search query
-    filtered_images = [
-        img for img in st.session_state.saved_images_list 
-        if search_query.lower() in os.path.basename(img).lower()
-    ]
+    total_images = history_index.count(unique=filter_duplicates, search=search_query, limit=HISTORY_LIMIT)
     
     # Pagination
-    total_pages = max((len(filtered_images) - 1) // items_per_page + 1, 1)
+    total_pages = max((total_images - 1) // items_per_page + 1, 1)
+    st.session_state.page_number = min(st.session_state.page_number, total_pages - 1)
     
     # Pagination controls
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -64,17 +64,16 @@ def render(list_saved_images, print_image, preper_image):
             st.session_state.page_number += 1
             st.rerun()
     
-    # Calculate start and end indices for current page
-    start_idx = st.session_state.page_number * items_per_page
-    end_idx = min(start_idx + items_per_page, len(filtered_images))
-    
     # Display current page images
     cols_per_row = 3
-    current_page_images = filtered_images[start_idx:end_idx]
+    current_page_images = history_index.page(
+        st.session_state.page_number * items_per_page, items_per_page,
+        unique=filter_duplicates, search=search_query, limit=HISTORY_LIMIT,
+    )
     
     # Show total count of filtered images
-    if len(filtered_images) > 0:
-        st.caption(f"Showing {len(current_page_images)} of {len(filtered_images)} images")
+    if total_images > 0:
+        st.caption(f"Showing {len(current_page_images)} of {total_images} images")
         
         # Display images in grid
         for i in range(0, len(current_page_images), cols_per_row):
@@ -83,23 +82,21 @@ def render(list_saved_images, print_image, preper_image):
                 idx = i + j
                 if idx < len(current_page_images):
                     with cols[j]:
-                        image_path = current_page_images[idx]
+                        entry = current_page_images[idx]
+                        image_path = entry.path
                         try:
-                            image = Image.open(image_path)
-                            st.image(image, width='stretch')
+                            st.image(entry.thumbnail, width='stretch')
                             
-                            filename = os.path.basename(image_path)
-                            modified_time = datetime.fromtimestamp(
-                                os.path.getmtime(image_path)
-                            ).strftime("%Y-%m-%d %H:%M")
-                            st.caption(f"{filename}\n{modified_time}")
+                            filename = entry.name or os.path.basename(image_path)
+                            modified_time = datetime.fromtimestamp(entry.mtime).strftime("%Y-%m-%d %H:%M")
+                            st.caption(f"{filename}\n{modified_time} · {entry.width}×{entry.height}")
                             
                             col1, col2 = st.columns(2)
                             with col1:
                                 if st.button("Print", key=f"print_history_{idx}_{st.session_state.page_number}"):
                                     image_to_print = Image.open(image_path).convert("RGB")
-                                    grayscale_image, dithered_image = preper_image(image_to_print)
-                                    print_image(grayscale_image, dither=True)
+                                    prepared = prepare_image(image_to_print, label_width=printer_info['label_width'])
+                                    print_image(prepared.grayscale.copy(), printer_info, dither=True)
                             with col2:
                                 if st.button("Send to Sticker", key=f"send_to_sticker_{idx}_{st.session_state.page_number}"):
                                     st.session_state.selected_image_path = image_path
@@ -10,51 +10,23 @@ logger = logging.getLogger("sticker_factory.tabs.label")
 def render(printer_info, get_fonts, find_url, preper_image, print_image, img_concat_v):
     """Render the Label tab - implementation from main printit.py."""
     import streamlit as st
-    import os
     import qrcode
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import ImageFont
+    from preview import preview
+    from font_catalog import font_catalog
+    from font_cache import fit_font_size, get_font
+    from label_layout import render_text_label
     
     st.subheader(":printer: a label")
 
     label_type = printer_info["label_type"]
     label_width = printer_info["label_width"]
     # Helper functions
-    def calculate_actual_image_height_with_empty_lines(text, font, line_spacing=10):
-        draw = ImageDraw.Draw(Image.new("RGB", (1, 1), color="white"))
-        total_height = 0
-        ascent, descent = font.getmetrics()
-        font_height = ascent + descent
-
-        for line in text.split("\n"):
-            if line.strip():
-                bbox = draw.textbbox((0, 0), line, font=font)
-                text_height = max(bbox[3] - bbox[1], font_height)
-            else:
-                text_height = font_height
-            total_height += text_height + line_spacing
-
-        padding = 20
-        return total_height + (padding * 2)
-
-    def calculate_max_font_size(width, text, font_path, start_size=10, end_size=200, step=1):
+    def calculate_max_font_size(width, text, font_path, start_size=10, end_size=200):
         try:
-            draw = ImageDraw.Draw(Image.new("RGB", (1, 1), color="white"))
-            max_font_size = start_size
-
-            for size in range(start_size, end_size, step):
-                try:
-                    font = ImageFont.truetype(font_path, size)
-                except OSError:
-                    return 50
-                adjusted_lines = [line for line in text.split("\n")]
-                max_text_width = max([draw.textbbox((0, 0), line, font=font)[2] for line in adjusted_lines if line.strip()])
-
-                if max_text_width <= width:
-                    max_font_size = size
-                else:
-                    break
-
-            return max_font_size
+            return fit_font_size(width, text, font_path, start_size, end_size)
+        except OSError:
+            return 50
         except Exception as e:
             logger.error(f"Error in calculate_max_font_size: {e}")
             return 50
@@ -80,7 +52,7 @@ def render(printer_info, get_fonts, find_url, preper_image, print_image, img_con
         font = st.session_state.selected_font
 
         try:
-            test_font = ImageFont.truetype(font, 12)
+            get_font(font, 12)
         except OSError:
             working_font = None
             system_fonts = [
@@ -91,7 +63,7 @@ def render(printer_info, get_fonts, find_url, preper_image, print_image, img_con
             
             for sys_font in system_fonts:
                 try:
-                    ImageFont.truetype(sys_font, 12)
+                    get_font(sys_font, 12)
                     working_font = sys_font
                     break
                 except OSError:
@@ -142,28 +114,10 @@ def render(printer_info, get_fonts, find_url, preper_image, print_image, img_con
         if fontstuff:
             with col1:
                 # Create a mapping of font names (from metadata) to paths
-                def get_font_display_name(font_path):
-                    """Extract the actual font name from TTF file or use filename as fallback"""
-                    try:
-                        font = ImageFont.truetype(font_path, 12)
-                        # Try to get the font name from the font object
-                        if hasattr(font, 'getname'):
-                            name = font.getname()
-                            if name:
-                                # Join tuple elements with space (e.g., ('Guatemala', 'Italic') -> 'Guatemala Italic')
-                                if isinstance(name, tuple):
-                                    return ' '.join(name)
-                                return name
-                        # Fallback to filename without extension
-                        return os.path.splitext(os.path.basename(font_path))[0]
-                    except Exception:
-                        # Fallback to filename without extension
-                        return os.path.splitext(os.path.basename(font_path))[0]
-                
-                font_display_names = [get_font_display_name(f) for f in fonts]
+                font_display_names = [font_catalog.display_name(f) for f in fonts]
                 font_name_to_path = {name: path for name, path in zip(font_display_names, fonts)}
                 
-                current_font_name = get_font_display_name(st.session_state.selected_font)
+                current_font_name = font_catalog.display_name(st.session_state.selected_font)
                 
                 selected_font_name = st.selectbox(
                     "Choose your font",
@@ -200,54 +154,25 @@ def render(printer_info, get_fonts, find_url, preper_image, print_image, img_con
                 logger.error(f"Error calculating font size for {font}: {e}")
             font_size = st.slider("Font Size", 20, max_size + 50, max_size, help="Supports both TTF and OTF fonts")
 
-        try:
-            if font is None:
-                fnt = ImageFont.load_default()
-            else:
-                try:
-                    fnt = ImageFont.truetype(font, font_size)
-                except (OSError, TypeError):
-                    # Fallback if font loading fails (TTF or OTF)
-                    fnt = ImageFont.load_default()
-                    st.warning(f"Font {font} not found, using default font.")
-        except Exception as e:
+        if font is not None:
             try:
-                fnt = ImageFont.load_default()
-                st.warning(f"Error loading font {font}: {e}")
-            except Exception as load_e:
-                st.error(f"Error loading font: {load_e}")
-        
-        line_spacing = 20
-        new_image_height = calculate_actual_image_height_with_empty_lines(text, fnt, line_spacing)
-        padding = 20
-        img = Image.new("RGB", (label_width, new_image_height), color="white")
-        d = ImageDraw.Draw(img)
-        y = padding
+                get_font(font, font_size)
+            except (OSError, TypeError):
+                # Fallback if font loading fails (TTF or OTF)
+                st.warning(f"Font {font} not found, using default font.")
+                font = None
 
-        for line in text.split("\n"):
-            text_width = 0
-            ascent, descent = fnt.getmetrics()
-            font_height = ascent + descent
-
-            if line.strip():
-                bbox = d.textbbox((0, y), line, font=fnt)
-                text_width = bbox[2] - bbox[0]
-                text_height = max(bbox[3] - bbox[1], font_height)
-            else:
-                text_height = font_height
-
-            if alignment == "center":
-                x = (label_width - text_width) // 2
-            elif alignment == "right":
-                x = label_width - text_width
-            else:
-                x = 0
-
-            d.text((x, y), line, font=fnt, fill=(0, 0, 0))
-            y += text_height + line_spacing
+        img = render_text_label(text, label_width, font, font_size, alignment, line_spacing=20, padding=20)
 
         qr = qrcode.QRCode(border=0)
         qrurl = st.text_input("add a QRcode to your sticker")
+
+        col_copies, col_cut = st.columns(2)
+        with col_copies:
+            copies = st.number_input("Copies", min_value=1, max_value=100, value=1, key="label_copies")
+        with col_cut:
+            cut_each = st.checkbox("Cut after each label", value=True, key="label_cut_each",
+                                   help="Uncheck to print all copies as one strip, cut at the end")
         
         if qrurl:
             qr.add_data(qrurl)
@@ -256,17 +181,17 @@ def render(printer_info, get_fonts, find_url, preper_image, print_image, img_con
 
             if imgqr and img:
                 imgqr = img_concat_v(img, imgqr,image_width=label_width)
-                st.image(imgqr, width='stretch')
+                st.image(preview(imgqr), width='stretch')
                 if st.button("Print sticker+qr", key="print_sticker_qr"):
-                    print_image(imgqr)
+                    print_image(imgqr, printer_info=printer_info, copies=copies, cut_each=cut_each)
             elif imgqr and not (img):
                 if st.button("Print sticker", key="print_qr_only"):
-                    print_image(imgqr)
+                    print_image(imgqr, printer_info=printer_info, copies=copies, cut_each=cut_each)
 
         if text and not (qrurl):
-            st.image(img, width='stretch')
+            st.image(preview(img), width='stretch')
             if st.button("Print sticker", key="print_text_only"):
-                print_image(img,printer_info=printer_info)
+                print_image(img, printer_info=printer_info, copies=copies, cut_each=cut_each)
                 st.success("sticker sent to printer")
         
         st.markdown("""
@@ -4,7 +4,13 @@ import logging
 import streamlit as st
 import os
 from PIL import Image
-import io
+
+from app_cache import decode_upload, fetch_image, load_pdf_page, pdf_page_count
+from config_manager import PRIVACY_MODE
+from dithering import ALGORITHMS, DEFAULT_ALGORITHM
+from label_archive import label_archive
+from pdf_pages import PdfPages, parse_page_range
+from preview import preview
 
 logger = logging.getLogger("sticker_factory.tabs.sticker")
 
@@ -16,24 +22,44 @@ def fetch_image_from_url(url):
         return None
         
     try:
-        import requests
-        from io import BytesIO
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        # Verify content type is an image
-        content_type = response.headers.get('content-type', '')
-        if not content_type.startswith('image/'):
-            st.error('URL does not point to a valid image')
-            return None
-            
-        return Image.open(BytesIO(response.content)).convert("RGB")
+        return fetch_image(url).convert("RGB")
+    except ValueError as e:
+        st.error(str(e))
+        return None
     except Exception as e:
         st.error(f'Error fetching image: {str(e)}')
         return None
 
 
-def render(preper_image, print_image,printer_info):
+def select_dither_algorithm(key):
+    """Selectbox for the dithering algorithm used in the preview and the print."""
+    return st.selectbox("Dithering algorithm", list(ALGORITHMS), format_func=ALGORITHMS.get, key=key)
+
+
+def print_pdf_pages(pdf_data, pages, dpi, prepare_image, print_image, printer_info):
+    """Multi-page PDF: preview the first selected page and print the selection as one batch job."""
+    col1, col2 = st.columns(2)
+    with col1:
+        dither_checkbox = st.checkbox(
+            "Dither - _use for high detail, true by default_", value=True,
+            key="sticker_pdf_dither"
+        )
+        algorithm = select_dither_algorithm("sticker_pdf_algorithm") if dither_checkbox else DEFAULT_ALGORITHM
+    with col2:
+        rotate_checkbox = st.checkbox("Rotate - _90 degrees_", key="sticker_pdf_rotate")
+
+    # Pages are rendered as the print job reaches them, not all up front
+    batch = PdfPages(pdf_data, pages, dpi, printer_info['label_width'], rotate=90 if rotate_checkbox else 0)
+    if st.button(f"Print {len(batch)} pages as one job", key="sticker_pdf_print"):
+        print_image(batch, printer_info, dither=dither_checkbox, dither_algorithm=algorithm)
+
+    first_page = batch[0]
+    if dither_checkbox:
+        first_page = prepare_image(first_page, label_width=printer_info['label_width']).dithered(algorithm)
+    st.image(preview(first_page), caption=f"Page {pages[0] + 1}, first of {len(pages)} selected pages")
+
+
+def render(prepare_image, print_image,printer_info):
     """Render the Sticker tab."""
     st.subheader(":printer: a sticker")
 
@@ -42,7 +68,6 @@ def render(preper_image, print_image,printer_info):
         image_path = st.session_state.selected_image_path
         try:
             image_to_process = Image.open(image_path).convert("RGB")
-            grayscale_image, dithered_image = preper_image(image_to_process, label_width=printer_info['label_width'])
             
             st.info(f"Image loaded from history: {os.path.basename(image_path)}")
             
@@ -53,14 +78,16 @@ def render(preper_image, print_image,printer_info):
                     "Dither - _use for high detail, true by default_", value=True,
                     key="dither_history"
                 )
+                algorithm = select_dither_algorithm("algorithm_history") if dither_checkbox else DEFAULT_ALGORITHM
             with col2:
                 rotate_checkbox = st.checkbox("Rotate - _90 degrees_", key="rotate_history")
+            prepared = prepare_image(image_to_process, label_width=printer_info['label_width'])
 
             # Display image based on checkbox status
             if dither_checkbox:
-                st.image(dithered_image, caption="Resized and Dithered Image")
+                st.image(preview(prepared.dithered(algorithm)), caption="Resized and Dithered Image")
             else:
-                st.image(image_to_process, caption="Original Image")
+                st.image(preview(image_to_process), caption="Original Image")
 
             # Print button
             button_text = "Print "
@@ -73,7 +100,8 @@ def render(preper_image, print_image,printer_info):
             if st.button(button_text, key="print_history"):
                 rotate_value = 90 if rotate_checkbox else 0
                 dither_value = dither_checkbox
-                print_image(image_to_process, rotate=rotate_value, dither=dither_value)
+                print_image(image_to_process, printer_info, rotate=rotate_value, dither=dither_value,
+                            dither_algorithm=algorithm)
                 
             if st.button("Clear Selection"):
                 del st.session_state.selected_image_path
@@ -96,42 +124,42 @@ def render(preper_image, print_image,printer_info):
     # Process uploaded file or URL
     if uploaded_image is not None:
         image_to_process = None
-        original_filename_without_extension = os.path.splitext(uploaded_image.name)[0]
         
         # Handle PDF files
         if uploaded_image.type == "application/pdf":
             try:
                 import fitz  # PyMuPDF
                 
-                st.info("PDF file detected. Converting the first page to an image.")
+                pdf_data = uploaded_image.getvalue()
+                page_count = pdf_page_count(pdf_data)
                 dpi_selected = st.selectbox("Select the DPI for the conversion", [72, 92, 150, 300, 600], index=1)
-                
-                # Open the PDF file
-                pdf_document = fitz.open(stream=uploaded_image.read(), filetype="pdf")
-                
-                # Convert the first page to an image
-                page = pdf_document.load_page(0)
-                pix = page.get_pixmap(dpi=dpi_selected)
-                image_to_process = Image.open(io.BytesIO(pix.tobytes("png")))
-                
+                selected_pages = [0]
+                if page_count > 1:
+                    page_range = st.text_input(
+                        f"Pages to print (1-{page_count}, e.g. 1-3, 5 or all)", value="1", key="sticker_pdf_pages"
+                    )
+                    selected_pages = parse_page_range(page_range, page_count)
+
+                if len(selected_pages) == 1:
+                    st.info(f"PDF file detected. Converting page {selected_pages[0] + 1} of {page_count} to an image.")
+                    # Convert the page to an image (cached per document and DPI)
+                    image_to_process = load_pdf_page(pdf_data, selected_pages[0], dpi_selected)
+                else:
+                    print_pdf_pages(pdf_data, selected_pages, dpi_selected, prepare_image, print_image, printer_info)
+
             except ImportError:
                 st.error("PyMuPDF (fitz) is not installed. Install it with: pip install pymupdf")
                 st.stop()
+            except ValueError as e:
+                st.error(f"Invalid page selection: {e}")
             except Exception as e:
                 st.error(f"Error converting PDF: {str(e)}")
                 st.stop()
         else:
             # Convert the uploaded file to a PIL Image
-            image_to_process = Image.open(uploaded_image).convert("RGB")
+            image_to_process = decode_upload(uploaded_image.getvalue(), "RGB")
 
         if image_to_process:
-            grayscale_image, dithered_image = preper_image(image_to_process, label_width=printer_info['label_width'])
-
-            # Paths to save the original and dithered images in the 'temp' directory with postfix
-            original_image_path = os.path.join(
-                "temp", original_filename_without_extension + "_original.png"
-            )
-
             # Create checkboxes for rotation and dithering (dither default to True) inline
             col1, col2 = st.columns(2)
             with col1:
@@ -139,8 +167,10 @@ def render(preper_image, print_image,printer_info):
                     "Dither - _use for high detail, true by default_", value=True,
                     key="sticker_dither"
                 )
+                algorithm = select_dither_algorithm("sticker_algorithm") if dither_checkbox else DEFAULT_ALGORITHM
             with col2:
                 rotate_checkbox = st.checkbox("Rotate - _90 degrees_", key="sticker_rotate")
+            prepared = prepare_image(image_to_process, label_width=printer_info['label_width'])
 
             # Determine the button text based on checkbox states
             button_text = "Print "
@@ -154,21 +184,20 @@ def render(preper_image, print_image,printer_info):
             if st.button(button_text, key="sticker_print"):
                 rotate_value = 90 if rotate_checkbox else 0
                 dither_value = dither_checkbox
-                print_image(image_to_process,printer_info, rotate=rotate_value, dither=dither_value)
+                print_image(image_to_process,printer_info, rotate=rotate_value, dither=dither_value,
+                            dither_algorithm=algorithm)
 
             # Display image based on checkbox status
             try:
                 if dither_checkbox:
-                    st.image(dithered_image, caption="Resized and Dithered Image")
+                    st.image(preview(prepared.dithered(algorithm)), caption="Resized and Dithered Image")
                 else:
-                    st.image(image_to_process, caption="Original Image")
-            
+                    st.image(preview(image_to_process), caption="Original Image")
 
-                # Create 'temp' directory if it doesn't exist
-                os.makedirs("temp", exist_ok=True)
-                
-                # Save original image
-                image_to_process.save(original_image_path, "PNG")
+                # Archive the original once per upload for the History tab
+                if not PRIVACY_MODE and st.session_state.get("sticker_archived") != uploaded_image.file_id:
+                    label_archive.store(image_to_process, source="upload", name=uploaded_image.name)
+                    st.session_state.sticker_archived = uploaded_image.file_id
             except ValueError as e:
                 logger.error(f"Error displaying image: {str(e)}")
         
@@ -177,9 +206,6 @@ def render(preper_image, print_image,printer_info):
         image_to_process = fetch_image_from_url(image_url)
         if image_to_process:
             
-            # Process the fetched image
-            grayscale_image, dithered_image = preper_image(image_to_process, label_width=printer_info['label_width'])
-            
             # Create checkboxes for rotation and dithering
             col1, col2 = st.columns(2)
             with col1:
@@ -187,9 +213,13 @@ def render(preper_image, print_image,printer_info):
                     "Dither - _use for high detail, true by default_", value=True,
                     key="dither_url"
                 )
+                algorithm = select_dither_algorithm("algorithm_url") if dither_checkbox else DEFAULT_ALGORITHM
             with col2:
                 rotate_checkbox = st.checkbox("Rotate - _90 degrees_", key="rotate_url")
 
+            # Process the fetched image
+            prepared = prepare_image(image_to_process, label_width=printer_info['label_width'])
+
             # Determine button text
             button_text = "Print "
             if rotate_checkbox:
@@ -202,13 +232,14 @@ def render(preper_image, print_image,printer_info):
             if st.button(button_text, key="print_url"):
                 rotate_value = 90 if rotate_checkbox else 0
                 dither_value = dither_checkbox
-                print_image(image_to_process, rotate=rotate_value, dither=dither_value)
+                print_image(image_to_process, printer_info, rotate=rotate_value, dither=dither_value,
+                            dither_algorithm=algorithm)
 
             # Display image based on checkbox status
             if dither_checkbox:
-                st.image(dithered_image, caption="Resized and Dithered Image")
+                st.image(preview(prepared.dithered(algorithm)), caption="Resized and Dithered Image")
             else:
-                st.image(image_to_process, caption="Original Image")
+                st.image(preview(image_to_process), caption="Original Image")
 
             # # Save original image
             # original_image_path = os.path.join("temp", filename)
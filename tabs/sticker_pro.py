@@ -3,10 +3,15 @@
 import logging
 import streamlit as st
 import requests
-import io
 import os
 from PIL import Image, ImageOps, ImageDraw, ImageFont
 
+from app_cache import decode_upload, fetch_image, load_pdf_page, pdf_page_count
+from dithering import ALGORITHMS, DEFAULT_ALGORITHM
+from font_cache import get_font
+from preview import downscale, encode_preview
+from tone_curve import ToneCurve
+
 logger = logging.getLogger("sticker_factory.tabs.sticker_pro")
 
 
@@ -37,7 +42,7 @@ def make_meme_text(image, top_text, bottom_text, font_size=20, outline_width=3):
     
     try:
         if font_path:
-            font = ImageFont.truetype(font_path, font_size)
+            font = get_font(font_path, font_size)
         else:
             font = ImageFont.load_default()
     except Exception:
@@ -82,8 +87,7 @@ def make_meme_text(image, top_text, bottom_text, font_size=20, outline_width=3):
     return meme_image
 
 
-def render(print_image,printer_info, apply_threshold, add_border, apply_histogram_equalization, 
-           resize_image_to_width, preper_image):
+def render(print_image,printer_info, add_border, resize_image_to_width, prepare_image):
     """Render the Sticker Pro tab."""
     st.subheader(":printer: a sticker for pros")
     
@@ -105,16 +109,17 @@ def render(print_image,printer_info, apply_threshold, add_border, apply_histogra
                 try:
                     import fitz  # PyMuPDF
                     
-                    st.info("PDF file detected. Converting the first page to an image.")
+                    pdf_data = uploaded_file.getvalue()
+                    page_count = pdf_page_count(pdf_data)
                     dpi_selected = st.selectbox("Select the DPI for the conversion", [72, 92, 150, 300, 600], index=1, key="sticker_pro_pdf_dpi")
+                    page_number = 1
+                    if page_count > 1:
+                        page_number = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                                                      value=1, key="sticker_pro_pdf_page")
+                    st.info(f"PDF file detected. Converting page {page_number} to an image.")
                     
-                    # Open the PDF file
-                    pdf_document = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-                    
-                    # Convert the first page to an image
-                    page = pdf_document.load_page(0)
-                    pix = page.get_pixmap(dpi=dpi_selected)
-                    image = Image.open(io.BytesIO(pix.tobytes("png")))
+                    # Convert the page to an image (cached per document, page and DPI)
+                    image = load_pdf_page(pdf_data, page_number - 1, dpi_selected)
                     
                 except ImportError:
                     st.error("PyMuPDF (fitz) is not installed. Install it with: pip install pymupdf")
@@ -124,22 +129,16 @@ def render(print_image,printer_info, apply_threshold, add_border, apply_histogra
                     st.stop()
             else:
                 # Process regular image file
-                image = Image.open(uploaded_file)
+                image = decode_upload(uploaded_file.getvalue())
         elif image_url:
             # Validate and fetch image from URL
             if not image_url.startswith('https://'):
                 st.error('Only HTTPS URLs are allowed for security')
             else:
                 try:
-                    response = requests.get(image_url, timeout=10)
-                    response.raise_for_status()
-                    
-                    # Verify content type is an image
-                    content_type = response.headers.get('content-type', '')
-                    if not content_type.startswith('image/'):
-                        st.error('URL does not point to a valid image')
-                    else:
-                        image = Image.open(io.BytesIO(response.content))
+                    image = fetch_image(image_url)
+                except ValueError as e:
+                    st.error(str(e))
                 except requests.exceptions.RequestException as e:
                     st.error(f'Error fetching image: {str(e)}')
                 except Exception as e:
@@ -199,8 +198,10 @@ def render(print_image,printer_info, apply_threshold, add_border, apply_histogra
             if mirror_checkbox:
                 image = ImageOps.mirror(image)
             
+            # Invert, levels, equalize and threshold are applied together as one lookup table
+            tone = ToneCurve()
             if invert_checkbox:
-                image = ImageOps.invert(image)
+                tone = tone.invert()
             
             black_point = 0
             white_point = 255
@@ -214,21 +215,24 @@ def render(print_image,printer_info, apply_threshold, add_border, apply_histogra
             
             # Apply histogram equalization if selected
             if equalize_checkbox:
-                image = apply_histogram_equalization(image, black_point, white_point)
+                tone = tone.levels(black_point, white_point).equalize()
             
             # Process image based on choice
             dither = False
-            grayscale_image = None
-            dithered_image = None
+            algorithm = DEFAULT_ALGORITHM
             if print_choice == "Original":
                 dither = st.checkbox("Dither - approximate grey tones with dithering", value=True, key="sticker_pro_dither")
-                grayscale_image, dithered_image = preper_image(image, label_width=printer_info['label_width'])
-                display_image = dithered_image if dither else grayscale_image
+                if dither:
+                    algorithm = st.selectbox("Dithering algorithm", list(ALGORITHMS), format_func=ALGORITHMS.get,
+                                             key="sticker_pro_algorithm")
+                if tone:
+                    image = tone.apply(image)
+                prepared = prepare_image(image, label_width=printer_info['label_width'])
+                display_image = prepared.dithered(algorithm) if dither else prepared.grayscale
             else:  # Threshold
                 threshold_percent = st.slider("Threshold (%)", 0, 100, 50, key="sticker_pro_threshold")
                 threshold = int(threshold_percent * 255 / 100)
-                display_image = apply_threshold(image, threshold)
-                grayscale_image = image.convert("L")
+                display_image = tone.threshold(threshold).apply(image)
             
             # Get meme text if checkbox is enabled
             meme_top_text = ""
@@ -239,22 +243,26 @@ def render(print_image,printer_info, apply_threshold, add_border, apply_histogra
                 meme_font_size = st.slider("Meme Font Size", 10, 100, 20, key="sticker_pro_meme_font_size_final")
                 meme_outline_width = st.slider("Meme Outline Width", 1, 10, 3, key="sticker_pro_meme_outline_width")
 
-            # Create a copy for display with border if needed
-            preview_image = display_image.copy()
+            # Border and meme text for the preview are drawn on a display-size copy;
+            # display_image stays full size for printing
+            preview_image = downscale(display_image)
+            scale = preview_image.width / display_image.width
             if border_checkbox:
                 preview_image = add_border(preview_image)
 
             if meme_checkbox and (meme_top_text or meme_bottom_text):
                 logger.debug(f"Meme outline width type: {type(meme_outline_width)}")
                 logger.debug(f"Meme font size type: {type(meme_font_size)}")
-                preview_image = make_meme_text(preview_image, meme_top_text, meme_bottom_text, meme_font_size, meme_outline_width)
+                preview_image = make_meme_text(preview_image, meme_top_text, meme_bottom_text,
+                                               max(1, round(meme_font_size * scale)),
+                                               max(1, round(meme_outline_width * scale)))
         
         with col2:
-            st.image(preview_image, caption="Preview", width='stretch')
+            st.image(encode_preview(preview_image), caption="Preview", width='stretch')
         
         print_button_label = f"Print {print_choice} Image"
         if print_choice == "Original" and dither:
-            print_button_label += ", Dithering"
+            print_button_label += f", {ALGORITHMS[algorithm]} Dithering"
         if rotate_checkbox and not rotate_disabled:
             print_button_label += ", Rotated 90°"
         if mirror_checkbox:
@@ -273,7 +281,7 @@ def render(print_image,printer_info, apply_threshold, add_border, apply_histogra
                 print_display_image = make_meme_text(print_display_image, meme_top_text, meme_bottom_text, meme_font_size, meme_outline_width)
             
             if print_choice == "Original":
-                print_image(print_display_image, printer_info, rotate=rotate, dither=dither)
+                print_image(print_display_image, printer_info, rotate=rotate, dither=dither, dither_algorithm=algorithm)
             else:
                 print_image(print_display_image, printer_info, rotate=rotate, dither=False)
             st.success("Print job sent to printer!")
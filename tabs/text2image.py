@@ -11,6 +11,10 @@ from pathlib import Path
 from PIL import Image, PngImagePlugin
 from datetime import datetime
 
+from config_manager import PRIVACY_MODE
+from history_index import history_index
+from preview import preview
+
 logger = logging.getLogger("sticker_factory.tabs.text2image")
 
 # Load configuration directly from config.toml
@@ -60,6 +64,8 @@ def generate_image(prompt, steps, label_width):
             os.makedirs(temp_dir, exist_ok=True)
             filename = os.path.join(temp_dir, "txt2img_" + current_date + ".png")
             image.save(filename, pnginfo=pnginfo)
+            if not PRIVACY_MODE:
+                history_index.add(filename, image)
 
             return image
         else:
@@ -78,7 +84,7 @@ def submit(st_session_state):
     st_session_state.generated_image = None
 
 
-def render(submit_func, generate_image_func, preper_image, print_image, printer_info):
+def render(submit_func, generate_image_func, prepare_image, print_image, printer_info):
     """Render the Text2image tab."""
     st.subheader(":printer: image from text")
     st.write("using tami stable diffusion bot")
@@ -93,22 +99,22 @@ def render(submit_func, generate_image_func, preper_image, print_image, printer_
 
     if st.session_state.generated_image:
         generated_image = st.session_state.generated_image
-        grayscale_image, dithered_image = preper_image(generated_image, label_width=printer_info['label_width'])
+        prepared = prepare_image(generated_image, label_width=printer_info['label_width'])
 
         col1, col2 = st.columns(2)
         with col1:
-            st.image(grayscale_image, caption="Original Image")
+            st.image(preview(prepared.grayscale), caption="Original Image")
         with col2:
-            st.image(dithered_image, caption="Resized and Dithered Image")
+            st.image(preview(prepared.dithered()), caption="Resized and Dithered Image")
 
         col3, col4 = st.columns(2)
         with col3:
             if st.button("Print Original Image", key="print_original_t2i"):
-                print_image(grayscale_image)
+                print_image(prepared.grayscale.copy(), printer_info)
                 st.success("Original image sent to printer!")
         with col4:
             if st.button("Print Dithered Image", key="print_dithered_t2i"):
-                print_image(grayscale_image, dither=True)
+                print_image(prepared.grayscale.copy(), printer_info, dither=True)
                 st.success("Dithered image sent to printer!")
 
     st.session_state.last_prompt = prompt
@@ -0,0 +1,50 @@
+"""Prepared images shared through the cache must survive PRIVACY_MODE closing printed images."""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from PIL import Image
+
+import printer_utils
+from image_utils import PreparedImageCache, image_digest
+
+
+class FakeQueue:
+    """print_queue stand-in whose jobs complete as soon as they are added."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def add_job(self, image, **params):
+        self.jobs.append(image)
+        return str(len(self.jobs))
+
+    def get_job_status(self, job_id):
+        return SimpleNamespace(status="completed", progress={"printed": 1, "total": 1})
+
+    def wait_for_job(self, job_id, timeout=None):
+        return True
+
+
+def test_prepared_image_does_not_alias_source():
+    source = Image.new("L", (696, 100), 128)
+    prepared = PreparedImageCache().get(source, 696)
+    assert prepared.resized is not source
+    source.close()
+    assert prepared.dithered().size == (696, 100)
+
+
+def test_print_twice_from_one_cached_entry():
+    cache = PreparedImageCache()
+    printer_info = {"label_type": "62", "label_width": 696}
+    with mock.patch.object(printer_utils, "print_queue", FakeQueue()), \
+            mock.patch.object(printer_utils, "PRIVACY_MODE", True), \
+            mock.patch.object(printer_utils, "DEBUG_TEMP_FILES", False), \
+            mock.patch.object(printer_utils, "st"):
+        for _ in range(2):
+            # What the Webcam, Text2image and History tabs do on each print
+            prepared = cache.get(Image.new("L", (696, 100), 128), 696)
+            assert printer_utils.print_image(prepared.grayscale.copy(), printer_info, dither=True)
+            image_digest(prepared.grayscale)
+            prepared.dithered("atkinson")
+    assert cache.stats()["hits"] == 1
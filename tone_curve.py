@@ -0,0 +1,130 @@
+"""Composable grayscale tone curves applied as a single lookup table."""
+
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger("sticker_factory.tone_curve")
+
+IDENTITY = tuple(range(256))
+
+
+def _levels_lut(black_point, white_point):
+    lut = []
+    for i in range(256):
+        if i <= black_point:
+            lut.append(0)
+        elif i >= white_point:
+            lut.append(255)
+        else:
+            normalized = (i - black_point) / (white_point - black_point)
+            lut.append(int(normalized * 255))
+    return lut
+
+
+def _step_lut(step):
+    kind, *args = step
+    if kind == "levels":
+        return _levels_lut(*args)
+    if kind == "threshold":
+        (level,) = args
+        return [255 if i > level else 0 for i in range(256)]
+    if kind == "invert":
+        return [255 - i for i in range(256)]
+    raise ValueError(f"Unknown tone curve step: {kind}")
+
+
+@lru_cache(maxsize=256)
+def _static_lut(steps):
+    """Compose a run of image independent steps into one table."""
+    lut = IDENTITY
+    for step in steps:
+        table = _step_lut(step)
+        lut = tuple(table[value] for value in lut)
+    return lut
+
+
+def _equalize_lut(histogram):
+    """The table ImageOps.equalize would use for an L image with this histogram."""
+    histo = [count for count in histogram if count]
+    if len(histo) <= 1:
+        return IDENTITY
+    step = (sum(histo) - histo[-1]) // 255
+    if not step:
+        return IDENTITY
+    lut = []
+    n = step // 2
+    for i in range(256):
+        lut.append(min(n // step, 255))
+        n += histogram[i]
+    return tuple(lut)
+
+
+class ToneCurve:
+    """
+    Chain of levels / equalize / invert / threshold operations on grayscale values.
+
+    Builder methods return a new curve, so curves can be shared and cached.
+    apply() composes the chain into one 256-entry table and maps the image
+    in a single Image.point pass instead of one full-size intermediate per
+    step. Runs of steps that do not depend on the image are composed once
+    and cached; equalize is resolved from the input histogram pushed
+    through the preceding steps. A curve ending in threshold yields a
+    1-bit image.
+    """
+
+    def __init__(self, steps=()):
+        self.steps = tuple(steps)
+
+    def __bool__(self):
+        return bool(self.steps)
+
+    def __repr__(self):
+        return f"ToneCurve({self.steps!r})"
+
+    def levels(self, black_point=0, white_point=255):
+        if black_point == 0 and white_point == 255:
+            return self
+        return ToneCurve(self.steps + (("levels", black_point, white_point),))
+
+    def equalize(self):
+        return ToneCurve(self.steps + (("equalize",),))
+
+    def invert(self):
+        return ToneCurve(self.steps + (("invert",),))
+
+    def threshold(self, level):
+        return ToneCurve(self.steps + (("threshold", level),))
+
+    def lut(self, histogram=None):
+        """Return the composed table; histogram (of the input) is required if the curve equalizes."""
+        lut = IDENTITY
+        run = []
+        for step in self.steps + (None,):
+            if step is not None and step[0] != "equalize":
+                run.append(step)
+                continue
+            if run:
+                table = _static_lut(tuple(run))
+                lut = tuple(table[value] for value in lut)
+                run = []
+            if step is None:
+                break
+            if histogram is None:
+                raise ValueError("equalize needs the input histogram")
+            # Histogram of the image as it would look after the steps so far
+            current = [0] * 256
+            for value, count in zip(lut, histogram):
+                current[value] += count
+            table = _equalize_lut(current)
+            lut = tuple(table[value] for value in lut)
+        return lut
+
+    def apply(self, image):
+        """Map image (converted to L) through the curve in one pass."""
+        if image.mode != "L":
+            image = image.convert("L")
+        needs_histogram = any(step[0] == "equalize" for step in self.steps)
+        lut = self.lut(image.histogram() if needs_histogram else None)
+        if self.steps and self.steps[-1][0] == "threshold":
+            return image.point(lut, mode="1")
+        return image.point(lut)